@@ -0,0 +1,10 @@
+"""Performance benchmarks, run as ``python -m benchmarks.<name>``."""
+import os
+
+
+def setup_django():
+    """Configure Django for a benchmark run outside of manage.py."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
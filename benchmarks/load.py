@@ -0,0 +1,424 @@
+"""Load test the onboarding flow end to end.
+
+Run with ``python -m benchmarks.load [--target T] [--users N]
+[--concurrency N] [--output FILE] [--compare FILE]``. Every simulated
+user goes through register, otp, verify_otp, login and refresh, against
+one of these targets:
+
+- ``wsgi`` and ``asgi``: the Django applications, in process;
+- ``gunicorn`` and ``gunicorn-asgi``: a local gunicorn server, with sync
+  or Uvicorn workers.
+
+Runs use a fresh SQLite database. The report shows requests per second
+and latency percentiles per endpoint; ``--output`` saves it as JSON and
+``--compare`` checks it against a saved run, failing when an endpoint's
+p95 latency regressed by more than ``--max-regression`` percent.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import httpx
+
+from benchmarks import setup_django
+
+ENDPOINTS = {
+    "sync": {
+        "register": "/api/users/register/",
+        "otp": "/api/users/otp/",
+        "verify_otp": "/api/users/verify_otp/",
+    },
+    "async": {
+        "register": "/api/async/users/register/",
+        "otp": "/api/async/users/otp/",
+        "verify_otp": "/api/async/users/verify_otp/",
+    },
+}
+BASE_URL = "http://testserver"
+LOGIN = "/api/users/login/"
+REFRESH = "/api/users/login/refresh/"
+PASSWORD = "benchmark-secret"
+
+
+def identifiers(count: int, start: int = 0):
+    """Generate distinct identifiers, alternating emails and phones."""
+    for number in range(start, start + count):
+        if number % 2:
+            yield f"+254{710000000 + number}", "PHONE_NUMBER"
+        else:
+            yield f"user{number}@load.example.com", "EMAIL"
+
+
+def percentile(ordered: list, percent: float) -> float:
+    """Nearest rank percentile of sorted values."""
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+class Recorder:
+    """Collect the latency and failures of every request."""
+
+    def __init__(self):
+        """Start with no requests."""
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, endpoint: str, request):
+        """Time an awaitable request, returning its JSON body or None."""
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            response = None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if response is None or response.is_error:
+            self.errors[endpoint] += 1
+            return None
+        return response.json()
+
+    def summary(self, elapsed: float) -> dict:
+        """Return requests per second and percentiles per endpoint."""
+        return {
+            endpoint: self.endpoint_summary(endpoint, elapsed)
+            for endpoint in self.latencies
+        }
+
+    def endpoint_summary(self, endpoint: str, elapsed: float) -> dict:
+        """Summarize the requests made to a single endpoint."""
+        ordered = sorted(self.latencies[endpoint])
+        milliseconds = {
+            f"p{percent}_ms": round(percentile(ordered, percent) * 1000, 3)
+            for percent in (50, 95, 99)
+        }
+        return {
+            "requests": len(ordered),
+            "errors": self.errors[endpoint],
+            "requests_per_second": round(len(ordered) / elapsed, 2),
+            **milliseconds,
+        }
+
+
+class Flow:
+    """The onboarding flow of one simulated user."""
+
+    def __init__(self, client, recorder: Recorder, options):
+        """Bind the flow to a client, its recorder and the run options."""
+        self.client = client
+        self.recorder = recorder
+        self.paths = ENDPOINTS[options.endpoints]
+        self.headers = {"Authorization": f"Token {options.token}"}
+
+    def post(self, endpoint: str, path: str, payload: dict):
+        """Record an authenticated JSON POST to an endpoint.
+
+        Every endpoint of the flow, login included, requires an API token.
+        """
+        request = self.client.post(path, json=payload, headers=self.headers)
+        return self.recorder.call(endpoint, request)
+
+    async def onboard(self, identifier: str, identifier_type: str) -> None:
+        """Register, verify the identifier, then log in and refresh."""
+        user = {"identifier": identifier, "identifier_type": identifier_type}
+        registration = {
+            **user,
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+        }
+        if not await self.api("register", registration):
+            return
+        if await self.api("otp", user):
+            code = await self.client.otp_code(identifier, identifier_type)
+            await self.api("verify_otp", {**user, "code": code})
+        await self.login(identifier)
+
+    def api(self, endpoint: str, payload: dict):
+        """Call one of the user endpoints."""
+        return self.post(endpoint, self.paths[endpoint], payload)
+
+    async def login(self, identifier: str) -> None:
+        """Log in and refresh the token pair."""
+        credentials = {"identifier": identifier, "password": PASSWORD}
+        tokens = await self.post("login", LOGIN, credentials)
+        if tokens:
+            await self.post("refresh", REFRESH, {"refresh": tokens["refresh"]})
+
+
+async def drive(client, options) -> tuple:
+    """Onboard every user, `concurrency` of them at a time.
+
+    Returns the report of every endpoint and the elapsed seconds.
+    """
+    recorder = Recorder()
+    flow = Flow(client, recorder, options)
+    queue = asyncio.Queue()
+    for user in identifiers(options.users):
+        queue.put_nowait(user)
+
+    async def worker():
+        while not queue.empty():
+            await flow.onboard(*queue.get_nowait())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(options.concurrency)))
+    elapsed = time.perf_counter() - started
+    return recorder.summary(elapsed), elapsed
+
+
+def read_otp_code(identifier: str, identifier_type: str) -> str:
+    """Read the code sent to an identifier, as its owner would."""
+    from django.db import connection
+
+    from onboarding.users.models import OneTimePin
+
+    try:
+        return OneTimePin.objects.values_list("code", flat=True).get(
+            identifier=identifier, identifier_type=identifier_type
+        )
+    finally:
+        connection.close()
+
+
+class Client:
+    """Async HTTP client that also reads OTP codes off the database."""
+
+    def __init__(self, client, executor: ThreadPoolExecutor):
+        """Wrap an HTTP client; `executor` runs database reads."""
+        self.client = client
+        self.executor = executor
+
+    def post(self, path: str, **kwargs):
+        """Send a POST request."""
+        return self.client.post(path, **kwargs)
+
+    def run_sync(self, func, *args):
+        """Run a blocking call in the executor."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, func, *args)
+
+    def otp_code(self, identifier: str, identifier_type: str):
+        """Read the OTP code of an identifier."""
+        return self.run_sync(read_otp_code, identifier, identifier_type)
+
+
+class WSGIClient(Client):
+    """Call the WSGI application in process, from executor threads."""
+
+    def post(self, path: str, **kwargs):
+        """Send a POST request from a thread."""
+        return self.run_sync(lambda: self.client.post(path, **kwargs))
+
+
+@asynccontextmanager
+async def in_process(options, executor):
+    """Serve requests with the Django application in this process."""
+    if options.target == "wsgi":
+        from django.core.wsgi import get_wsgi_application
+
+        transport = httpx.WSGITransport(app=get_wsgi_application())
+        with httpx.Client(transport=transport, base_url=BASE_URL) as client:
+            yield WSGIClient(client, executor)
+        return
+
+    from django.core.asgi import get_asgi_application
+
+    transport = httpx.ASGITransport(app=get_asgi_application())
+    async with httpx.AsyncClient(
+        transport=transport, base_url=BASE_URL
+    ) as client:
+        yield Client(client, executor)
+
+
+def free_port() -> int:
+    """Pick a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def gunicorn_command(options, port: int) -> list:
+    """Build the command line of the gunicorn server."""
+    command = [sys.executable, "-m", "gunicorn", "config.wsgi"]
+    if options.target == "gunicorn-asgi":
+        command[-1] = "config.asgi"
+        command += ["--worker-class", "uvicorn.workers.UvicornWorker"]
+    return command + [
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(options.workers),
+        "--log-level",
+        "warning",
+    ]
+
+
+async def wait_until_up(client: httpx.AsyncClient, server) -> None:
+    """Poll the server until it answers, failing if it exits."""
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            await client.get("/metrics")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("gunicorn did not start")
+
+
+@asynccontextmanager
+async def spawned(options, executor):
+    """Serve requests with a local gunicorn server."""
+    port = free_port()
+    server = subprocess.Popen(
+        gunicorn_command(options, port),
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    limits = httpx.Limits(max_connections=options.concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+        ) as client:
+            await wait_until_up(client, server)
+            yield Client(client, executor)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+TARGETS = {
+    "wsgi": in_process,
+    "asgi": in_process,
+    "gunicorn": spawned,
+    "gunicorn-asgi": spawned,
+}
+
+
+async def benchmark(options) -> tuple:
+    """Run the flow against the target, see `drive`."""
+    executor = ThreadPoolExecutor(max_workers=options.concurrency)
+    with executor:
+        async with TARGETS[options.target](options, executor) as client:
+            return await drive(client, options)
+
+
+def prepare_database(path: str) -> str:
+    """Create the schema and return the API token of an operator."""
+    os.environ["BENCHMARK_DATABASE"] = path
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+    setup_django()
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+
+    from onboarding.users.models import MyUser
+
+    call_command("migrate", verbosity=0)
+    operator = MyUser.objects.create_user(
+        identifier="operator@load.example.com",
+        identifier_type="EMAIL",
+        password=PASSWORD,
+    )
+    return Token.objects.create(user=operator).key
+
+
+def git_commit() -> str | None:
+    """Return the checked out commit, if any."""
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"], capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def regressions(report: dict, baseline: dict, threshold: float) -> list:
+    """List the endpoints whose p95 latency grew over the threshold."""
+    found = []
+    for endpoint, summary in report["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before and summary["p95_ms"] > before["p95_ms"] * (
+            1 + threshold / 100
+        ):
+            found.append(
+                f"{endpoint}: p95 {before['p95_ms']} ms -> "
+                f"{summary['p95_ms']} ms"
+            )
+    return found
+
+
+def print_report(report: dict) -> None:
+    """Print the report as a table."""
+    print(
+        f"{report['target']}, {report['users']} users, "
+        f"concurrency {report['concurrency']}, "
+        f"{report['elapsed_seconds']} s"
+    )
+    print(
+        f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for endpoint, summary in report["endpoints"].items():
+        print(
+            f"{endpoint:<12}{summary['requests']:>10}{summary['errors']:>8}"
+            f"{summary['requests_per_second']:>10}{summary['p50_ms']:>10}"
+            f"{summary['p95_ms']:>10}{summary['p99_ms']:>10}"
+        )
+
+
+def parse_args():
+    """Parse the command line options."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=TARGETS, default="wsgi")
+    parser.add_argument("--endpoints", choices=ENDPOINTS, default="sync")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", help="Save the report as JSON.")
+    parser.add_argument("--compare", help="Report saved by a previous run.")
+    parser.add_argument("--max-regression", type=float, default=20.0)
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark, then save and compare its report."""
+    options = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        options.token = prepare_database(f"{directory}/db.sqlite3")
+        endpoints, elapsed = asyncio.run(benchmark(options))
+
+    report = {
+        "commit": git_commit(),
+        "target": options.target,
+        "endpoints_kind": options.endpoints,
+        "users": options.users,
+        "concurrency": options.concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": endpoints,
+    }
+    print_report(report)
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if options.compare:
+        check(report, options)
+
+
+def check(report: dict, options) -> None:
+    """Exit with an error if the run regressed against the baseline."""
+    with open(options.compare) as baseline:
+        found = regressions(
+            report, json.load(baseline), options.max_regression
+        )
+    for regression in found:
+        print(f"Regression {regression}")
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Django settings of the load benchmark.
+
+The project settings, against the throwaway SQLite database named by
+`BENCHMARK_DATABASE`, without throttling and without debug query logs.
+"""
+import os
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import DATABASES
+
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+
+DATABASES["default"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": os.environ["BENCHMARK_DATABASE"],
+    # Concurrent writers queue on SQLite's single write lock.
+    "OPTIONS": {"timeout": 60},
+}
+
+THROTTLE_RATES = {}
@@ -0,0 +1,89 @@
+"""Benchmark the sliding window throttle against DRF's throttle.
+
+Run with ``python -m benchmarks.throttling [--requests N] [--clients N]``.
+Both throttles count the same requests against the default cache; the
+report shows requests per second and cache calls per request.
+"""
+import argparse
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from benchmarks import setup_django
+
+
+def count_calls(cache, calls):
+    """Count the calls made to the cache's counter methods."""
+    for name in ("get", "set", "add", "incr"):
+        method = getattr(cache, name)
+
+        def counted(*args, _method=method, _name=name, **kwargs):
+            calls[_name] += 1
+            return _method(*args, **kwargs)
+
+        setattr(cache, name, counted)
+
+
+def run(throttle_class, requests, view, calls):
+    """Send the requests through fresh throttles, like DRF does."""
+    calls.clear()
+    started = time.perf_counter()
+    allowed = sum(
+        throttle_class().allow_request(request, view) for request in requests
+    )
+    elapsed = time.perf_counter() - started
+    return allowed, elapsed
+
+
+def main():
+    """Run both throttles and print the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--rate", default="100/m")
+    options = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import caches
+    from rest_framework.throttling import SimpleRateThrottle
+
+    from onboarding.users.throttling import IPRateThrottle
+
+    class DRFThrottle(SimpleRateThrottle):
+        rate = options.rate
+
+        def get_cache_key(self, request, view):
+            return self.cache_format % {
+                "scope": "drf",
+                "ident": self.get_ident(request),
+            }
+
+    settings.THROTTLE_RATES = {"otp_ip": options.rate}
+    cache = caches[settings.THROTTLE_CACHE_ALIAS]
+    calls = Counter()
+    count_calls(cache, calls)
+    DRFThrottle.cache = cache
+
+    requests = [
+        SimpleNamespace(META={"REMOTE_ADDR": f"10.0.{i // 256}.{i % 256}"})
+        for i in range(options.clients)
+    ] * (options.requests // options.clients)
+    view = SimpleNamespace(action="otp")
+
+    for name, throttle_class in (
+        ("sliding window", IPRateThrottle),
+        ("DRF SimpleRateThrottle", DRFThrottle),
+    ):
+        cache.clear()
+        allowed, elapsed = run(throttle_class, requests, view, calls)
+        per_request = sum(calls.values()) / len(requests)
+        print(
+            f"{name}: {len(requests) / elapsed:,.0f} requests/s, "
+            f"{allowed} allowed, {per_request:.2f} cache calls/request "
+            f"({dict(calls)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
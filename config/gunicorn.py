@@ -0,0 +1,7 @@
+"""Gunicorn settings."""
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited."""
+    multiprocess.mark_process_dead(worker.pid)
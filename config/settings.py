@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -48,6 +49,12 @@ def get_bool_env(env_var, default=False):
         raise Exception("Invalid boolean config: {}".format(val))
 
 
+def get_list_env(env_var, default=""):
+    """Parse comma separated environment variables, skipping blanks."""
+    values = os.getenv(env_var, default).split(",")
+    return [value.strip() for value in values if value.strip()]
+
+
 def get_running_environment(var_name):
     """Get the environment the code is running in."""
     environment = get_env_variable(var_name)
@@ -93,6 +100,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "onboarding.users.metrics.MetricsMiddleware",
+    "onboarding.users.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -134,6 +143,52 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# The token authentication cache, throttles and CacheOTPStore only work
+# across workers with a shared cache, e.g. CACHE_BACKEND set to
+# "django.core.cache.backends.redis.RedisCache" and CACHE_LOCATION to
+# "redis://redis:6379/0". The default LocMemCache is private to a process.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.2/topics/logging/
+
+# Send the app's records, such as sampled request timings, to the console
+# at LOG_LEVEL. Secrets, OTP codes included, must never be logged.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "console": {
+            "format": "{asctime} {levelname} {name} {process:d} {message}",
+            "style": "{",
+        },
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "console",
+        },
+    },
+    "loggers": {
+        "onboarding": {
+            "handlers": ["console"],
+            "level": os.getenv("LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -152,6 +207,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Number of parsed identifiers kept in each process's normalization cache.
+IDENTIFIER_CACHE_SIZE = 10000
+
+# Users listed per page by default, and at most, by `GET /api/users/`.
+USERS_PAGE_SIZE = 100
+USERS_MAX_PAGE_SIZE = 1000
+
+# Rows fetched per database round trip when exporting users.
+USERS_EXPORT_CHUNK_SIZE = 2000
+
+# Bloom filter answering identifier availability checks: false positive
+# rate, smallest capacity and seconds between rebuilds from the database.
+IDENTIFIER_FILTER_ERROR_RATE = 0.01
+IDENTIFIER_FILTER_MIN_CAPACITY = 100000
+IDENTIFIER_FILTER_REBUILD_SECONDS = 600
+
+# Largest number of users accepted by one batch registration request. Every
+# password is hashed during the request, about 0.4s each when inline.
+REGISTER_BATCH_MAX_SIZE = 50
+
+# Number of processes used to hash and check passwords; 0 hashes inline.
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "0"))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -180,4 +258,81 @@ AUTH_USER_MODEL = "users.MyUser"
 
 OTP_VALIDITY_SECONDS = 10
 
+# How long token authentication lookups are cached, in seconds.
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+AUTH_TOKEN_CACHE_ALIAS = "default"
+
+# Accept "Bearer <access token>" on the API, trusting the user claims in
+# the token instead of loading the user from the database.
+JWT_CLAIMS_AUTHENTICATION = get_bool_env("JWT_CLAIMS_AUTHENTICATION", False)
+
+# Shape of generated OTP codes; codes can be at most 16 characters long.
+OTP_CODE_LENGTH = 6
+OTP_CODE_ALPHABET = "0123456789"
+
+# Minimum number of seconds before an identifier can be sent a new OTP.
+OTP_RESEND_COOLDOWN_SECONDS = 30
+
+# Providers used by the OTP dispatcher (`manage.py dispatch_otps`) to
+# deliver codes, keyed by identifier type. Set the backends with
+# OTP_EMAIL_PROVIDER and OTP_SMS_PROVIDER, e.g. to
+# "onboarding.users.providers.EmailProvider" / "SMSProvider", and their
+# options as JSON objects with OTP_EMAIL_PROVIDER_OPTIONS and
+# OTP_SMS_PROVIDER_OPTIONS, e.g. {"url": ..., "batch_url": ...,
+# "token": ..., "max_connections": 10}. The default LoggingProvider only
+# passes the system checks with DEBUG on.
+OTP_PROVIDERS = {
+    "EMAIL": {
+        "BACKEND": os.getenv(
+            "OTP_EMAIL_PROVIDER", "onboarding.users.providers.LoggingProvider"
+        ),
+        "OPTIONS": json.loads(os.getenv("OTP_EMAIL_PROVIDER_OPTIONS", "{}")),
+    },
+    "PHONE_NUMBER": {
+        "BACKEND": os.getenv(
+            "OTP_SMS_PROVIDER", "onboarding.users.providers.LoggingProvider"
+        ),
+        "OPTIONS": json.loads(os.getenv("OTP_SMS_PROVIDER_OPTIONS", "{}")),
+    },
+}
+OTP_MESSAGE = "Your one time PIN is {code}"
+OTP_OUTBOX_BATCH_SIZE = 100
+OTP_OUTBOX_MAX_ATTEMPTS = 5
+OTP_OUTBOX_BACKOFF_SECONDS = 5
+OTP_OUTBOX_LEASE_SECONDS = 60
+
+# Percentage of requests whose SQL, hashing, serializer and provider
+# timings are collected, returned as Server-Timing and logged.
+INSTRUMENTATION_SAMPLE_PERCENT = float(
+    os.getenv("INSTRUMENTATION_SAMPLE_PERCENT", "0")
+)
+
+# Addresses and networks allowed to scrape /metrics, comma separated. The
+# connecting address is checked, so scrape the app directly, not through
+# a proxy.
+METRICS_ALLOWED_IPS = get_list_env("METRICS_ALLOWED_IPS", "127.0.0.1,::1")
+
+# Seconds between synchronizations of each process's in-memory token
+# denylist with the revocation tables.
+TOKEN_DENYLIST_SYNC_SECONDS = 5
+
+# Sliding window rates of the throttled endpoints, keyed by
+# "<action>_<identifier|ip>", as "<requests>/<s|m|h|d>".
+THROTTLE_RATES = {
+    "otp_identifier": "10/h",
+    "otp_ip": "100/h",
+    "verify_otp_identifier": "10/m",
+    "verify_otp_ip": "100/m",
+    "available_ip": "600/m",
+}
+THROTTLE_CACHE_ALIAS = "default"
+
+# Stale one time PINs deleted per statement by `manage.py purge_otps`.
+OTP_PURGE_BATCH_SIZE = 1000
+
+# Dotted path to the backend that stores issued OTPs. Use
+# "onboarding.users.stores.CacheOTPStore" to keep them in the cache below.
+OTP_STORE = "onboarding.users.stores.DatabaseOTPStore"
+OTP_CACHE_ALIAS = "default"
+
 ENVIRONMENT = get_running_environment("ENVIRONMENT")
@@ -7,6 +7,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from onboarding.users.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="User Onboarding API",
@@ -19,6 +21,7 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path(
         "swagger<format>/",
         schema_view.without_ui(cache_timeout=0),
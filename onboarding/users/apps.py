@@ -7,3 +7,7 @@ class UsersConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "onboarding.users"
+
+    def ready(self):
+        """Connect the app's signal receivers and register its checks."""
+        from onboarding.users import checks, signals  # noqa: F401
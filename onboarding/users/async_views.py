@@ -0,0 +1,181 @@
+"""Async onboarding views for the ASGI application.
+
+These mirror the `register`, `otp` and `verify_otp` actions of
+`MyUserViewSet` but run on the event loop: database access goes through
+the async ORM, passwords are hashed on the hashing pool and OTP delivery
+is left to the outbox dispatcher, so a request never holds a thread
+while it waits. DRF views are sync only, hence plain Django views.
+"""
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.utils import IntegrityError
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    ParseError,
+    Throttled,
+)
+
+from onboarding.users.authentication import (
+    CachedTokenAuthentication,
+    ClaimsJWTAuthentication,
+)
+from onboarding.users.delivery import aissue_OTP
+from onboarding.users.metrics import REGISTRATIONS
+from onboarding.users.models import MyUser
+from onboarding.users.serializers import (
+    OneTimePinSerializer,
+    OneTimePinVerificationSerializer,
+    UserRegistrationSerializer,
+)
+from onboarding.users.stores import get_otp_store
+from onboarding.users.views import (
+    OTP_THROTTLES,
+    OTP_cooldown_headers,
+    registration_error,
+    registration_result,
+    user_tokens,
+)
+
+
+async def authenticate(request) -> bool:
+    """Authenticate the request like the API views do."""
+    credentials = await CachedTokenAuthentication().aauthenticate(request)
+    if credentials is None:
+        # Checking the token denylist may synchronize it from the database.
+        credentials = await sync_to_async(
+            ClaimsJWTAuthentication().authenticate
+        )(request)
+    return credentials is not None
+
+
+def parse_json(request) -> dict:
+    """Decode the JSON body of the request."""
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError as e:
+        raise ParseError(f"JSON parse error - {e}")
+
+
+def error_response(error: APIException) -> JsonResponse:
+    """Render an API exception the way DRF's exception handler does."""
+    detail = error.detail
+    if not isinstance(detail, (dict, list)):
+        detail = {"detail": detail}
+    response = JsonResponse(detail, status=error.status_code, safe=False)
+    if isinstance(error, NotAuthenticated):
+        response["WWW-Authenticate"] = CachedTokenAuthentication.keyword
+    if getattr(error, "wait", None):
+        response["Retry-After"] = "%d" % error.wait
+    return response
+
+
+async def check_throttles(request, view):
+    """Apply the OTP throttles, sharing their counters with the API views.
+
+    Scopes are named after the view, so endpoints without a configured
+    rate are not throttled.
+    """
+    waits = []
+    for throttle_class in OTP_THROTTLES:
+        throttle = throttle_class()
+        if not await throttle.aallow_request(request, view):
+            waits.append(throttle.wait())
+    if waits:
+        raise Throttled(max(waits))
+
+
+async def dispatch(view, request):
+    """Check the method, credentials and throttles, then call the view."""
+    if request.method != "POST":
+        raise MethodNotAllowed(request.method)
+    if not await authenticate(request):
+        raise NotAuthenticated()
+    request.data = parse_json(request)
+    await check_throttles(request, view)
+    return await view(request, request.data)
+
+
+def async_api_view(view):
+    """Serve an async view as an authenticated JSON POST endpoint."""
+
+    @wraps(view)
+    async def wrapper(request):
+        try:
+            return await dispatch(view, request)
+        except APIException as e:
+            return error_response(e)
+
+    # Like DRF views, token authenticated endpoints skip CSRF checks.
+    wrapper.csrf_exempt = True
+    # Same name as the `MyUserViewSet` action, for the throttle scopes.
+    view.action = view.__name__
+    return wrapper
+
+
+@async_api_view
+async def register(request, data):
+    """User registration."""
+    serializer = UserRegistrationSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    validated_data = serializer.validated_data
+
+    if validated_data["password"] != validated_data["confirm_password"]:
+        REGISTRATIONS.labels(result="invalid").inc()
+        return JsonResponse(
+            {"confirm_password": "passwords do not match"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        user = await MyUser.objects.aregister_user(
+            validated_data["identifier"],
+            validated_data["identifier_type"],
+            validated_data["password"],
+        )
+    except (ValidationError, IntegrityError) as e:
+        REGISTRATIONS.labels(result=registration_result(e)).inc()
+        return JsonResponse(
+            registration_error(e), status=status.HTTP_400_BAD_REQUEST
+        )
+
+    REGISTRATIONS.labels(result="created").inc()
+    return JsonResponse(user_tokens(user))
+
+
+@async_api_view
+async def otp(request, data):
+    """Send OTP to user for onboarding verification."""
+    serializer = OneTimePinSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    validated_data = serializer.validated_data
+    code = await aissue_OTP(
+        validated_data["identifier"],
+        validated_data["identifier_type"],
+    )
+    if code is None:
+        return JsonResponse(
+            {"one_time_PIN": "wait before requesting another one"},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers=OTP_cooldown_headers(),
+        )
+    return JsonResponse({"one_time_PIN": "sent successfully"})
+
+
+@async_api_view
+async def verify_otp(request, data):
+    """Verify OTP for user onboarding."""
+    serializer = OneTimePinVerificationSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    validated_data = serializer.validated_data
+    verified = await get_otp_store().averify(
+        validated_data["code"],
+        validated_data["identifier"],
+        validated_data["identifier_type"],
+    )
+    return JsonResponse({"verification": verified})
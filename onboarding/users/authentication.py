@@ -0,0 +1,126 @@
+"""Users app authentication classes."""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from onboarding.users.metrics import AUTH_CACHE
+from onboarding.users.revocation import is_revoked
+from onboarding.users.tokens import USER_CLAIMS, ClaimsUser
+
+
+def token_cache_key(key: str) -> str:
+    """Cache key of an authentication token snapshot."""
+    return f"auth:token:{key}"
+
+
+def forget_tokens(keys) -> None:
+    """Drop cached snapshots of the given token keys."""
+    caches[settings.AUTH_TOKEN_CACHE_ALIAS].delete_many(
+        [token_cache_key(key) for key in keys]
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches token to user lookups.
+
+    A drop-in replacement for DRF's `TokenAuthentication`: successful
+    lookups are kept for `AUTH_TOKEN_CACHE_TIMEOUT` seconds, and are
+    dropped early when the token is deleted or its user is saved (e.g.
+    deactivated or given a new password). Bulk `QuerySet.update` calls
+    skip those signals and are only picked up once the entry expires.
+    """
+
+    def authenticate_credentials(self, key):
+        """Look the token up in the cache before the database."""
+        cache = caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+        cache_key = token_cache_key(key)
+        credentials = cache.get(cache_key)
+        AUTH_CACHE.labels(
+            result="miss" if credentials is None else "hit"
+        ).inc()
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            cache.set(
+                cache_key, credentials, settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+        return credentials
+
+    def token_key(self, request) -> str | None:
+        """Extract the token key from the Authorization header, if any."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed(_("Invalid token header."))
+        return auth[1].decode(errors="replace")
+
+    async def aauthenticate(self, request):
+        """Authenticate a plain Django request from async code."""
+        key = self.token_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Look the token up with the async cache and ORM APIs."""
+        cache = caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+        cache_key = token_cache_key(key)
+        credentials = await cache.aget(cache_key)
+        AUTH_CACHE.labels(
+            result="miss" if credentials is None else "hit"
+        ).inc()
+        if credentials is None:
+            credentials = await self._afetch_credentials(key)
+            await cache.aset(
+                cache_key, credentials, settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+        return credentials
+
+    async def _afetch_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_("Invalid token."))
+
+        if not token.user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        return (token.user, token)
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """Bearer JWT authentication without a database lookup.
+
+    The access token is only verified cryptographically and the request
+    user is a `ClaimsUser` built from its claims; revoked tokens are
+    caught by the in-memory denylist. Enabled with the
+    `JWT_CLAIMS_AUTHENTICATION` setting; when disabled, Bearer tokens are
+    ignored and other authentication classes get their turn.
+    """
+
+    def authenticate(self, request):
+        """Authenticate the request if the mode is enabled."""
+        if not settings.JWT_CLAIMS_AUTHENTICATION:
+            return None
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        """Build the request user from the token claims."""
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            raise InvalidToken(_("Token contained no user claims"))
+        if is_revoked(validated_token.payload):
+            raise InvalidToken(_("Token is revoked"))
+
+        user = ClaimsUser(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
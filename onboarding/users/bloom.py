@@ -0,0 +1,163 @@
+"""Bloom filter of registered identifiers."""
+import hashlib
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class BloomFilter:
+    """Fixed size Bloom filter of strings.
+
+    Membership tests never give false negatives, and give false positives
+    at about `error_rate` once `capacity` values were added. Concurrent
+    writers must be serialized by the caller.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """Size the bit array and hash count for the capacity."""
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray(-(-self.size // 8))
+        self.count = 0
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        """Add a value to the filter."""
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, values) -> None:
+        """Add many values to the filter."""
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value: str) -> bool:
+        """Tell whether the value may have been added."""
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+def build_identifier_filter() -> BloomFilter:
+    """Build a filter of every registered identifier.
+
+    It is sized for twice the current number of users, so it can take
+    new registrations until the next rebuild.
+    """
+    identifiers = get_user_model().objects.values_list("identifier", flat=True)
+    bloom = BloomFilter(
+        max(2 * identifiers.count(), settings.IDENTIFIER_FILTER_MIN_CAPACITY),
+        settings.IDENTIFIER_FILTER_ERROR_RATE,
+    )
+    bloom.update(identifiers.iterator(chunk_size=10000))
+    return bloom
+
+
+class _IdentifierFilter:
+    """Per process identifier filter, rebuilt when it gets old or full.
+
+    Only one thread rebuilds; the others keep answering from the previous
+    filter, unless the process has none yet. Identifiers registered
+    while a rebuild reads the table are added to the new filter too.
+    """
+
+    def __init__(self):
+        """Start without a filter, it is built on first use."""
+        self.bloom = None
+        self.pid = None
+        self.built_at = 0.0
+        self.pending = None
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def stale(self) -> bool:
+        """Tell whether the filter should be rebuilt."""
+        age = time.monotonic() - self.built_at
+        return (
+            self.pid != os.getpid()
+            or age > settings.IDENTIFIER_FILTER_REBUILD_SECONDS
+            or self.bloom.count > self.bloom.capacity
+        )
+
+    def get(self) -> BloomFilter:
+        """Return the filter, rebuilding it if it is stale."""
+        if self.stale():
+            self.try_rebuild()
+        return self.bloom
+
+    def try_rebuild(self) -> None:
+        """Rebuild, or wait for another thread only if there is no filter."""
+        if not self.build_lock.acquire(blocking=self.pid != os.getpid()):
+            return
+        try:
+            if self.stale():
+                self.rebuild()
+        finally:
+            self.build_lock.release()
+
+    def rebuild(self) -> None:
+        """Replace the filter with a fresh one from the database."""
+        with self.lock:
+            self.pending = []
+        bloom = build_identifier_filter()
+        with self.lock:
+            bloom.update(self.pending)
+            self.bloom, self.pending = bloom, None
+            self.pid, self.built_at = os.getpid(), time.monotonic()
+
+    def add(self, identifiers: list) -> None:
+        """Add newly registered identifiers."""
+        with self.lock:
+            if self.pending is not None:
+                self.pending.extend(identifiers)
+            if self.bloom is not None:
+                self.bloom.update(identifiers)
+
+
+_identifier_filter = _IdentifierFilter()
+
+
+def remember_identifiers(identifiers) -> None:
+    """Record newly registered identifiers in this process's filter.
+
+    Other processes only learn about them when they rebuild their filter,
+    so until then they may report a taken identifier as available; the
+    unique constraint still rejects its registration.
+    """
+    _identifier_filter.add(list(identifiers))
+
+
+def identifier_taken(identifier: str) -> bool:
+    """Tell whether a normalized identifier is registered.
+
+    Identifiers missing from the filter are answered without a query;
+    the database only confirms possible matches.
+    """
+    if identifier not in _identifier_filter.get():
+        return False
+    return get_user_model().objects.filter(identifier=identifier).exists()
+
+
+@receiver(setting_changed)
+def reset_identifier_filter(setting, **kwargs):
+    """Rebuild the filter when it is reconfigured."""
+    global _identifier_filter
+    if setting.startswith("IDENTIFIER_FILTER_"):
+        _identifier_filter = _IdentifierFilter()
@@ -0,0 +1,52 @@
+"""Users app system checks."""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+
+LOGGING_PROVIDER = "onboarding.users.providers.LoggingProvider"
+
+PER_PROCESS_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    """Warn when state that workers must share lives in a process cache."""
+    aliases = {
+        "AUTH_TOKEN_CACHE_ALIAS": settings.AUTH_TOKEN_CACHE_ALIAS,
+        "THROTTLE_CACHE_ALIAS": settings.THROTTLE_CACHE_ALIAS,
+        "OTP_CACHE_ALIAS": settings.OTP_CACHE_ALIAS,
+    }
+    return [
+        Warning(
+            f"{setting} uses the per-process cache {alias!r}.",
+            hint=(
+                "Revoked tokens, throttles and cached OTPs are not shared "
+                "between workers; set CACHE_BACKEND and CACHE_LOCATION to "
+                "a Redis or Memcached server."
+            ),
+            id="users.W001",
+        )
+        for setting, alias in aliases.items()
+        if settings.CACHES[alias]["BACKEND"] in PER_PROCESS_CACHES
+    ]
+
+
+@register
+def check_OTP_providers(app_configs, **kwargs):
+    """Refuse to only log OTPs outside of development."""
+    if settings.DEBUG:
+        return []
+    return [
+        Error(
+            f"The {identifier_type} OTPs are only logged, never delivered.",
+            hint=(
+                "LoggingProvider is meant for development with DEBUG on; "
+                "set OTP_EMAIL_PROVIDER and OTP_SMS_PROVIDER."
+            ),
+            id="users.E001",
+        )
+        for identifier_type, config in settings.OTP_PROVIDERS.items()
+        if config["BACKEND"] == LOGGING_PROVIDER
+    ]
@@ -0,0 +1,146 @@
+"""One time PIN delivery through a transactional outbox."""
+import datetime
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from onboarding.users.instrumentation import timed
+from onboarding.users.metrics import OTP_ISSUED
+from onboarding.users.models import OutboxMessage
+from onboarding.users.providers import get_provider, render_OTP_message
+from onboarding.users.stores import get_otp_store
+
+
+def issue_OTP(identifier: str, identifier_type: str) -> str | None:
+    """Issue an OTP and queue its delivery in the same transaction.
+
+    Returns None when the identifier is still in its resend cooldown.
+    """
+    with transaction.atomic():
+        code = get_otp_store().issue(identifier, identifier_type)
+        if code is not None:
+            OutboxMessage.objects.create(
+                identifier=identifier,
+                identifier_type=identifier_type,
+                code=code,
+            )
+
+    OTP_ISSUED.labels(result="cooldown" if code is None else "issued").inc()
+    return code
+
+
+async def aissue_OTP(identifier: str, identifier_type: str) -> str | None:
+    """Issue an OTP from async code.
+
+    Django only runs transactions in sync code, so the store write and
+    the outbox insert take a single trip to the thread pool together.
+    """
+    return await sync_to_async(issue_OTP)(identifier, identifier_type)
+
+
+def _valid_since():
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.OTP_VALIDITY_SECONDS
+    )
+
+
+class OutboxDispatcher:
+    """Drain pending outbox messages in batches through the providers.
+
+    Claimed messages are leased by pushing their next attempt into the
+    future, so several dispatchers can run side by side and a crashed
+    one only delays its batch until the lease runs out. Failed sends are
+    retried with exponential backoff until the attempts run out, or until
+    the code is past its validity window and not worth sending anymore.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        max_attempts: int = None,
+        backoff: int = None,
+    ):
+        """Configure the dispatcher, defaulting to the settings."""
+        self.batch_size = batch_size or settings.OTP_OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.OTP_OUTBOX_MAX_ATTEMPTS
+        self.backoff = backoff or settings.OTP_OUTBOX_BACKOFF_SECONDS
+
+    def expire(self) -> int:
+        """Give up on pending messages whose code is no longer valid."""
+        return OutboxMessage.objects.filter(
+            status=OutboxMessage.PENDING, created__lt=_valid_since()
+        ).update(status=OutboxMessage.FAILED, last_error="Code expired")
+
+    def claim(self) -> list:
+        """Lease the next batch of due messages with a valid code."""
+        now = timezone.now()
+        lease = datetime.timedelta(seconds=settings.OTP_OUTBOX_LEASE_SECONDS)
+        with transaction.atomic():
+            batch = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=OutboxMessage.PENDING,
+                    next_attempt_at__lte=now,
+                    created__gte=_valid_since(),
+                )
+                .order_by("next_attempt_at")[: self.batch_size]
+            )
+            OutboxMessage.objects.filter(
+                pk__in=[message.pk for message in batch]
+            ).update(next_attempt_at=now + lease)
+
+        return batch
+
+    @timed("provider")
+    def send(self, messages: list) -> list:
+        """Send messages sharing an identifier type in one provider call."""
+        provider = get_provider(messages[0].identifier_type)
+        try:
+            return provider.send_batch(
+                [
+                    (message.identifier, render_OTP_message(message.code))
+                    for message in messages
+                ]
+            )
+        except Exception as e:
+            return [repr(e)] * len(messages)
+
+    def record(self, message: OutboxMessage, error: str | None) -> str:
+        """Update a message after a delivery attempt and return its fate."""
+        now = timezone.now()
+        message.attempts += 1
+        message.last_error = error or ""
+        if error is None:
+            message.status = OutboxMessage.SENT
+            message.sent_at = now
+            return "sent"
+
+        if message.attempts >= self.max_attempts:
+            message.status = OutboxMessage.FAILED
+            return "failed"
+
+        delay = self.backoff * 2 ** (message.attempts - 1)
+        message.next_attempt_at = now + datetime.timedelta(seconds=delay)
+        return "retried"
+
+    def run_once(self) -> Counter:
+        """Deliver one batch and count sent, retried, failed and expired."""
+        outcome = Counter(expired=self.expire())
+        batch = self.claim()
+        by_type = defaultdict(list)
+        for message in batch:
+            by_type[message.identifier_type].append(message)
+
+        for messages in by_type.values():
+            for message, error in zip(messages, self.send(messages)):
+                outcome[self.record(message, error)] += 1
+
+        OutboxMessage.objects.bulk_update(
+            batch,
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+        # Leave out the outcomes that did not happen.
+        return +outcome
@@ -0,0 +1,79 @@
+"""Streaming user exports."""
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from onboarding.users.models import MyUser
+
+EXPORT_FIELDS = (
+    "id",
+    "identifier",
+    "identifier_type",
+    "is_active",
+    "is_staff",
+    "date_joined",
+)
+
+
+def export_rows(
+    date_joined_after=None,
+    date_joined_before=None,
+    identifier_type=None,
+    is_active=None,
+    chunk_size=None,
+):
+    """Iterate over the users to export as tuples of `EXPORT_FIELDS`.
+
+    Rows are fetched `chunk_size` at a time with `QuerySet.iterator`, so
+    neither model instances nor the whole result set are kept in memory.
+    """
+    lookups = {
+        "date_joined__gte": date_joined_after,
+        "date_joined__lt": date_joined_before,
+        "identifier_type": identifier_type,
+        "is_active": is_active,
+    }
+    queryset = (
+        MyUser.objects.filter(
+            **{
+                key: value
+                for key, value in lookups.items()
+                if value is not None
+            }
+        )
+        .order_by("id")
+        .values_list(*EXPORT_FIELDS)
+    )
+    return queryset.iterator(
+        chunk_size=chunk_size or settings.USERS_EXPORT_CHUNK_SIZE
+    )
+
+
+def iter_ndjson(rows):
+    """Render rows as newline delimited JSON objects."""
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n"
+
+
+class _Echo:
+    """File-like object handing written lines back to the caller."""
+
+    def write(self, value):
+        """Return the value instead of buffering it."""
+        return value
+
+
+def iter_csv(rows):
+    """Render rows as CSV lines, starting with a header."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+EXPORTERS = {
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+    "csv": (iter_csv, "text/csv"),
+}
@@ -0,0 +1,77 @@
+"""One time PIN code generators."""
+import os
+import secrets
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+
+
+class CodeGenerator:
+    """Generate OTP codes from bulk CSPRNG draws.
+
+    Random bytes are drawn in bulk with `secrets.token_bytes` and mapped
+    onto the alphabet by rejection sampling, which keeps every symbol
+    equally likely without a system call per digit. Generated codes are
+    buffered per process and the buffer is dropped after a fork so that
+    worker processes never hand out the same codes.
+    """
+
+    def __init__(
+        self,
+        length: int = 6,
+        alphabet: str = "0123456789",
+        batch_size: int = 128,
+    ):
+        """Configure the code shape and how many codes to draw at once."""
+        if not 1 < len(alphabet) <= 256:
+            raise ValueError("The alphabet must have 2 to 256 symbols")
+
+        self.length = length
+        self.alphabet = alphabet
+        self.batch_size = batch_size
+        self._limit = 256 - 256 % len(alphabet)
+        self._codes = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _symbols(self, count: int) -> list:
+        """Draw `count` uniformly distributed alphabet symbols."""
+        size = len(self.alphabet)
+        symbols = []
+        while len(symbols) < count:
+            draw = secrets.token_bytes(count - len(symbols))
+            symbols.extend(
+                self.alphabet[byte % size]
+                for byte in draw
+                if byte < self._limit
+            )
+        return symbols
+
+    def generate_many(self, count: int) -> list:
+        """Generate `count` codes from a single bulk draw."""
+        symbols = self._symbols(count * self.length)
+        return [
+            "".join(symbols[start : start + self.length])  # noqa: E203
+            for start in range(0, len(symbols), self.length)
+        ]
+
+    def generate(self) -> str:
+        """Return the next buffered code, refilling the buffer if needed."""
+        with self._lock:
+            if not self._codes or self._pid != os.getpid():
+                self._codes = self.generate_many(self.batch_size)
+                self._pid = os.getpid()
+            return self._codes.pop()
+
+
+@lru_cache(maxsize=None)
+def _code_generator(length: int, alphabet: str) -> CodeGenerator:
+    return CodeGenerator(length=length, alphabet=alphabet)
+
+
+def get_code_generator() -> CodeGenerator:
+    """Return the shared generator for the configured code shape."""
+    return _code_generator(
+        settings.OTP_CODE_LENGTH, settings.OTP_CODE_ALPHABET
+    )
@@ -0,0 +1,113 @@
+"""Password hashing offloaded to a process pool."""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from onboarding.users.instrumentation import timed
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    """Make sure Django is configured in pool processes."""
+    django.setup()
+
+
+def _check(password: str, encoded: str) -> tuple:
+    """Check a password, reporting whether its hash needs an upgrade."""
+    outdated = []
+    valid = hashers.check_password(password, encoded, outdated.append)
+    return valid, bool(outdated)
+
+
+def make_executor(workers: int) -> ProcessPoolExecutor:
+    """Create a hashing process pool with Django set up in its workers."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def get_executor():
+    """Return the hashing process pool, or None to hash inline.
+
+    The pool is sized by `PASSWORD_HASHING_WORKERS` and created lazily in
+    every process, so gunicorn workers each get their own after forking.
+    """
+    global _executor, _executor_pid
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return None
+
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = make_executor(settings.PASSWORD_HASHING_WORKERS)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(func, *args):
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    return executor.submit(func, *args).result()
+
+
+async def _arun(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+@timed("hash")
+def hash_password(password: str | None) -> str:
+    """Hash a password, or make an unusable one for None."""
+    return _run(hashers.make_password, password)
+
+
+@timed("hash")
+def hash_passwords(passwords, executor=None, chunksize: int = 16) -> list:
+    """Hash many passwords, spreading them over the pool or `executor`."""
+    executor = executor or get_executor()
+    if executor is None:
+        return [hashers.make_password(password) for password in passwords]
+    return list(
+        executor.map(hashers.make_password, passwords, chunksize=chunksize)
+    )
+
+
+@timed("hash")
+def check_password(password: str, encoded: str, setter=None) -> bool:
+    """Check a password, calling `setter` when its hash is outdated."""
+    valid, outdated = _run(_check, password, encoded)
+    if outdated and setter:
+        setter(password)
+    return valid
+
+
+@timed("hash")
+async def ahash_password(password: str | None) -> str:
+    """Hash a password without blocking the event loop."""
+    return await _arun(hashers.make_password, password)
+
+
+@timed("hash")
+async def acheck_password(password: str, encoded: str, setter=None) -> bool:
+    """Check a password without blocking the event loop."""
+    valid, outdated = await _arun(_check, password, encoded)
+    if outdated and setter:
+        await setter(password)
+    return valid
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    """Replace the pool when its size changes."""
+    global _executor
+    if setting == "PASSWORD_HASHING_WORKERS" and _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
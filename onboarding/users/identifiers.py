@@ -0,0 +1,71 @@
+"""Identifier normalization and validation."""
+from functools import lru_cache
+
+import phonenumbers
+from django.conf import settings
+from django.contrib.auth.models import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from onboarding.users import EMAIL, PHONE_NUMBER
+
+INVALID_PHONE_NUMBER = "The phone number entered is not valid."
+
+
+def normalize_phone_number(identifier: str) -> str:
+    """Validate an international phone number and format it as E.164."""
+    try:
+        number = phonenumbers.parse(identifier, None)
+    except phonenumbers.NumberParseException:
+        number = None
+
+    if number is None or not phonenumbers.is_valid_number(number):
+        raise ValidationError(INVALID_PHONE_NUMBER)
+    return phonenumbers.format_number(
+        number, phonenumbers.PhoneNumberFormat.E164
+    )
+
+
+def normalize_email(identifier: str) -> str:
+    """Validate an email address and lowercase its domain."""
+    validate_email(identifier)
+    return BaseUserManager.normalize_email(identifier)
+
+
+NORMALIZERS = {
+    EMAIL: normalize_email,
+    PHONE_NUMBER: normalize_phone_number,
+}
+
+
+def guess_identifier_type(identifier: str) -> str:
+    """Tell an email address from a phone number."""
+    return EMAIL if "@" in identifier else PHONE_NUMBER
+
+
+@lru_cache(maxsize=settings.IDENTIFIER_CACHE_SIZE)
+def _normalize(identifier: str, identifier_type: str) -> tuple:
+    """Normalize an identifier, returning it or the validation messages.
+
+    Messages are cached instead of exceptions so that a fresh exception,
+    with a fresh traceback, is raised every time.
+    """
+    if identifier_type not in NORMALIZERS:
+        return None, [f"Unknown identifier type {identifier_type}"]
+    try:
+        return NORMALIZERS[identifier_type](identifier), None
+    except ValidationError as e:
+        return None, e.messages
+
+
+def normalize_identifier(identifier: str, identifier_type: str) -> str:
+    """Return the canonical form of an identifier.
+
+    Raises ValidationError when the identifier is not valid for its type.
+    Results are kept in a bounded LRU cache, so repeated identifiers are
+    only parsed once per process.
+    """
+    normalized, messages = _normalize(identifier, identifier_type)
+    if messages:
+        raise ValidationError(messages[0] if len(messages) == 1 else messages)
+    return normalized
@@ -0,0 +1,216 @@
+"""Per request performance instrumentation.
+
+Sampled requests collect the time spent in named operations: SQL queries
+as ``db`` and anything wrapped with `timed`, such as ``hash``,
+``serializer`` and ``provider``. The totals are sent back as a
+``Server-Timing`` header and logged as one JSON line per request.
+Outside of a sampled request `timed` only costs a context lookup.
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_timings = ContextVar("timings", default=None)
+
+
+class Timings:
+    """Time and number of calls per operation name."""
+
+    def __init__(self):
+        """Start with nothing recorded."""
+        self.started = time.perf_counter()
+        self.operations = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record one call of an operation."""
+        total, count = self.operations.get(name, (0.0, 0))
+        self.operations[name] = (total + seconds, count + 1)
+
+    def server_timing(self, duration: float) -> str:
+        """Render the timings as a ``Server-Timing`` header value."""
+        metrics = [
+            f'{name};dur={total * 1000:.1f};desc="{count} calls"'
+            for name, (total, count) in self.operations.items()
+        ]
+        metrics.append(f"total;dur={duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> dict:
+        """Return the timings in milliseconds, for logging."""
+        return {
+            name: {"ms": round(total * 1000, 3), "count": count}
+            for name, (total, count) in self.operations.items()
+        }
+
+
+class timed:
+    """Add the time spent in a block or a function to the request timings.
+
+    Use as ``with timed("hash"):`` or as the ``@timed("hash")`` decorator,
+    on sync and async functions alike.
+    """
+
+    def __init__(self, name: str):
+        """Name the timed operation."""
+        self.name = name
+
+    def __enter__(self):
+        """Start timing if the request is sampled."""
+        self.timings = _timings.get()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Record the elapsed time."""
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.started)
+
+    def __call__(self, func):
+        """Time every call of the function."""
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(self.name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+class TimedSerializerMixin:
+    """Count serializer validation and rendering as ``serializer`` time."""
+
+    @timed("serializer")
+    def is_valid(self, *args, **kwargs):
+        """Validate the data."""
+        return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        """Render the data."""
+        with timed("serializer"):
+            return super().data
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time the queries of every new database connection.
+
+    The wrapper stays installed for the life of the connection, so that
+    queries made from `sync_to_async` threads are counted too.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class SyncAndAsyncMiddleware:
+    """Base of middleware wrapping the view in sync and async chains alike.
+
+    `start` runs before the view and `stop` after it, even if it raised,
+    with what `start` returned. `report` then gets what `stop` returned
+    and returns the response.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Adapt to the rest of the middleware chain."""
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Handle a request in a sync chain."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            result = self.stop(state)
+        return self.report(request, response, result)
+
+    async def __acall__(self, request):
+        """Handle a request in an async chain."""
+        state = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            result = self.stop(state)
+        return self.report(request, response, result)
+
+    def start(self, request):
+        """Prepare for the view."""
+        raise NotImplementedError
+
+    def stop(self, state):
+        """Clean up after the view."""
+        raise NotImplementedError
+
+    def report(self, request, response, result):
+        """Act on the response."""
+        raise NotImplementedError
+
+
+class InstrumentationMiddleware(SyncAndAsyncMiddleware):
+    """Collect the timings of a sample of the requests.
+
+    `INSTRUMENTATION_SAMPLE_PERCENT` of the requests are sampled. Works
+    with both sync and async views.
+    """
+
+    def start(self, request):
+        """Start collecting timings if the request is sampled."""
+        sampled = (
+            random.random() * 100 < settings.INSTRUMENTATION_SAMPLE_PERCENT
+        )
+        return _timings.set(Timings() if sampled else None)
+
+    def stop(self, token) -> Timings | None:
+        """Stop collecting timings and return them."""
+        timings = _timings.get()
+        _timings.reset(token)
+        return timings
+
+    def report(self, request, response, timings: Timings | None):
+        """Add the Server-Timing header and log the timings."""
+        if timings is None:
+            return response
+
+        duration = time.perf_counter() - timings.started
+        response["Server-Timing"] = timings.server_timing(duration)
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "ms": round(duration * 1000, 3),
+                    "timings": timings.as_dict(),
+                }
+            )
+        )
+        return response
@@ -0,0 +1 @@
+"""Users app management commands."""
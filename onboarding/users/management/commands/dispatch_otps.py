@@ -0,0 +1,63 @@
+"""Deliver queued one time PINs."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from onboarding.users.delivery import OutboxDispatcher
+
+
+class Command(BaseCommand):
+    """Drain the OTP outbox in batches and report throughput."""
+
+    help = "Deliver queued one time PINs through the configured providers."
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument("--max-attempts", type=int)
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once the outbox has no due messages.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the dispatcher loop."""
+        dispatcher = OutboxDispatcher(
+            batch_size=options["batch_size"],
+            max_attempts=options["max_attempts"],
+        )
+        try:
+            self.loop(dispatcher, options["once"], options["idle_sleep"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping the dispatcher.")
+
+    def loop(self, dispatcher, once, idle_sleep):
+        """Dispatch batches, sleeping whenever the outbox is drained."""
+        while True:
+            if self.dispatch(dispatcher):
+                continue
+            if once:
+                return
+            time.sleep(idle_sleep)
+
+    def dispatch(self, dispatcher):
+        """Deliver one batch and report how it went."""
+        started = time.perf_counter()
+        outcome = dispatcher.run_once()
+        elapsed = time.perf_counter() - started
+        total = sum(outcome.values())
+        if total:
+            self.stdout.write(
+                f"Sent {outcome['sent']}, retried {outcome['retried']}, "
+                f"failed {outcome['failed']}, expired {outcome['expired']} "
+                f"in {elapsed:.3f}s "
+                f"({total / elapsed:.1f} messages/s)"
+            )
+        return total
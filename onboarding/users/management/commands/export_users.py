@@ -0,0 +1,52 @@
+"""Export users as NDJSON or CSV."""
+from django.core.management.base import BaseCommand, CommandError
+
+from onboarding.users.exports import EXPORTERS, export_rows
+from onboarding.users.serializers import UserExportFilterSerializer
+
+
+class Command(BaseCommand):
+    """Stream users to a file without loading them all in memory."""
+
+    help = "Export users as newline delimited JSON or CSV."
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument(
+            "--output-file", help="Defaults to the standard output."
+        )
+        parser.add_argument(
+            "--format", dest="output", choices=sorted(EXPORTERS)
+        )
+        parser.add_argument("--date-joined-after")
+        parser.add_argument("--date-joined-before")
+        parser.add_argument("--identifier-type")
+        parser.add_argument("--is-active")
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        """Write the export."""
+        filters = UserExportFilterSerializer(
+            data={
+                name: value
+                for name, value in options.items()
+                if name in UserExportFilterSerializer._declared_fields
+                and value is not None
+            }
+        )
+        if not filters.is_valid():
+            raise CommandError(filters.errors)
+
+        export = dict(filters.validated_data)
+        render, _ = EXPORTERS[export.pop("output")]
+        lines = render(export_rows(chunk_size=options["chunk_size"], **export))
+        self.write(lines, options["output_file"])
+
+    def write(self, lines, path):
+        """Write the lines to the file, or to the standard output."""
+        if path is None:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(path, "w", newline="") as stream:
+            stream.writelines(lines)
@@ -0,0 +1,148 @@
+"""Bulk import users from a CSV or NDJSON file."""
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from onboarding.users.hashing import make_executor
+from onboarding.users.models import MyUser
+
+# Key holding the reason a row could not be parsed.
+MALFORMED = object()
+
+
+def read_csv(stream):
+    """Yield rows of a CSV file with a header line."""
+    yield from csv.DictReader(stream)
+
+
+def parse_json_object(line: str) -> dict:
+    """Parse a JSON object, or a row telling why it is malformed."""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return {MALFORMED: f"Malformed JSON: {e}"}
+    if not isinstance(row, dict):
+        return {MALFORMED: "Not a JSON object"}
+    return row
+
+
+def read_ndjson(stream):
+    """Yield the objects of a newline delimited JSON file."""
+    for line in stream:
+        if line.strip():
+            yield parse_json_object(line)
+
+
+READERS = {"csv": read_csv, "jsonl": read_ndjson, "ndjson": read_ndjson}
+
+
+def build_user(row: dict) -> MyUser:
+    """Build the user of a row, raising `ValidationError` when invalid."""
+    if MALFORMED in row:
+        raise ValidationError(row[MALFORMED])
+    return MyUser.objects.build_user(
+        row.get("identifier", ""), row.get("identifier_type")
+    )
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items without reading ahead."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    """Stream users from a file into the database in chunks.
+
+    Rows need `identifier` and `identifier_type` and may carry a
+    `password`. Only one chunk is held in memory at a time, so memory use
+    does not depend on the size of the file.
+    """
+
+    help = "Import users from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes used to hash passwords.",
+        )
+
+    def handle(self, *args, **options):
+        """Import the file chunk by chunk."""
+        path = options["path"]
+        file_format = options["format"] or path.rsplit(".", 1)[-1].lower()
+        if file_format not in READERS:
+            raise CommandError(
+                f"Unknown file format {file_format!r}, pass --format with "
+                f"one of {', '.join(sorted(READERS))}."
+            )
+        reader = READERS[file_format]
+        self.totals = {"created": 0, "duplicate": 0, "invalid": 0}
+        self.started = time.perf_counter()
+
+        with open(path, newline="") as stream, make_executor(
+            options["workers"]
+        ) as executor:
+            rows = enumerate(reader(stream), start=1)
+            for chunk in chunked(rows, options["chunk_size"]):
+                self.import_chunk(chunk, executor)
+                self.report_progress()
+
+    def build_users(self, chunk):
+        """Validate a chunk of rows, reporting the invalid ones."""
+        users, passwords = [], []
+        for number, row in chunk:
+            try:
+                user = build_user(row)
+            except ValidationError as e:
+                self.skip(number, row.get("identifier"), "invalid", e.messages)
+                continue
+            user.row_number = number
+            users.append(user)
+            passwords.append(row.get("password") or None)
+        return users, passwords
+
+    def import_chunk(self, chunk, executor):
+        """Insert the valid, new users of a chunk."""
+        users, passwords = self.build_users(chunk)
+        created, duplicates = MyUser.objects.bulk_register(
+            users, passwords, executor
+        )
+        for user in duplicates:
+            self.skip(user.row_number, user.identifier, "duplicate")
+        self.totals["created"] += len(created)
+
+    def skip(self, number, identifier, reason, messages=()):
+        """Report a skipped row."""
+        self.totals[reason] += 1
+        details = f" ({' '.join(messages)})" if messages else ""
+        self.stderr.write(
+            f"row {number}: {reason} identifier {identifier}{details}"
+        )
+
+    def report_progress(self):
+        """Print the running totals and throughput."""
+        rows = sum(self.totals.values())
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f"{rows} rows: {self.totals['created']} created, "
+            f"{self.totals['duplicate']} duplicate, "
+            f"{self.totals['invalid']} invalid "
+            f"({rows / elapsed:.1f} rows/s)"
+        )
@@ -0,0 +1,56 @@
+"""Delete stale one time PINs and their outbox messages."""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from onboarding.users.models import OneTimePin, OutboxMessage
+
+
+class Command(BaseCommand):
+    """Delete expired and consumed pins in small batches.
+
+    Outbox messages that were sent or given up on are deleted too, as
+    they keep the codes in plain text. Every batch is its own short
+    DELETE, with an optional pause in between, so OTP writes are never
+    blocked for long.
+    """
+
+    help = (
+        "Delete one time PINs that expired or were consumed, and outbox "
+        "messages that were delivered or given up on."
+    )
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OTP_PURGE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to wait between batches.",
+        )
+
+    def handle(self, *args, **options):
+        """Purge batches until no stale pin or message is left."""
+        started = time.perf_counter()
+        pins = self.purge(OneTimePin.objects, **options)
+        messages = self.purge(OutboxMessage.objects, **options)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Deleted {pins} one time PINs and {messages} outbox messages "
+            f"in {elapsed:.3f}s ({(pins + messages) / elapsed:.1f} rows/s)"
+        )
+
+    def purge(self, manager, batch_size, sleep, **options) -> int:
+        """Delete a manager's stale rows batch by batch."""
+        total = 0
+        while deleted := manager.purge_batch(batch_size):
+            total += deleted
+            if deleted < batch_size:
+                break
+            time.sleep(sleep)
+        return total
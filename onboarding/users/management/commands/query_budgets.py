@@ -0,0 +1,125 @@
+"""Report the database queries of every API endpoint."""
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import override_settings
+
+from onboarding.users.query_budgets import ENDPOINT_BUDGETS, measure_endpoint
+
+
+def on_test_database(alias: str = DEFAULT_DB_ALIAS) -> bool:
+    """Tell whether a connection already uses its test database."""
+    connection = connections[alias]
+    test_name = connection.creation._get_test_db_name()
+    return connection.settings_dict["NAME"] == test_name
+
+
+@contextmanager
+def test_database(alias: str = DEFAULT_DB_ALIAS):
+    """Switch to a new test database, as the test runner does."""
+    if on_test_database(alias):
+        yield
+        return
+
+    connection = connections[alias]
+    name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(name, verbosity=0)
+
+
+def private_caches() -> dict:
+    """Replace every cache with one only this process sees."""
+    return {
+        alias: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"query-budgets-{alias}",
+        }
+        for alias in settings.CACHES
+    }
+
+
+class Command(BaseCommand):
+    """Measure the endpoints against their query budgets.
+
+    The scenarios create users and send fake traffic, so they run against
+    a new test database and private caches, never the configured ones,
+    and every endpoint is measured in a transaction that is rolled back.
+    """
+
+    help = "List the queries of every API endpoint against its budget."
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument(
+            "endpoints",
+            nargs="*",
+            help=(
+                "URL names of the endpoints to measure, with all of their "
+                "methods; all endpoints by default."
+            ),
+        )
+        parser.add_argument(
+            "--verbose-queries",
+            action="store_true",
+            help="Print the SQL of every query.",
+        )
+
+    def handle(self, *args, **options):
+        """Measure the endpoints and fail if any is over budget."""
+        names = {name for name, _ in ENDPOINT_BUDGETS}
+        unknown = set(options["endpoints"]) - names
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(unknown)}")
+
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            raise CommandError(
+                "Unset PROMETHEUS_MULTIPROC_DIR, the fake traffic would be "
+                "added to the metrics served by the app."
+            )
+
+        self.stdout.write(
+            f"{'endpoint':<32}{'status':>7}{'queries':>9}{'budget':>8}  tables"
+        )
+        selected = [
+            (name, method)
+            for name, method in ENDPOINT_BUDGETS
+            if name in options["endpoints"] or not options["endpoints"]
+        ]
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with test_database(), override_settings(
+            ALLOWED_HOSTS=hosts, CACHES=private_caches()
+        ):
+            over = [
+                f"{method.upper()} {name}"
+                for name, method in selected
+                if not self.report(name, method, options["verbose_queries"])
+            ]
+
+        if over:
+            raise CommandError(f"Over budget: {', '.join(over)}")
+
+    def report(self, name: str, method: str, verbose: bool) -> bool:
+        """Print the queries of an endpoint and tell if it is in budget."""
+        with transaction.atomic():
+            budget, response = measure_endpoint(name, method)
+            transaction.set_rollback(True)
+
+        violations = budget.violations()
+        endpoint = f"{method.upper()} {name}"
+        self.stdout.write(
+            f"{endpoint:<32}{response.status_code:>7}{len(budget.queries):>9}"
+            f"{budget.max_queries:>8}  {', '.join(sorted(budget.tables))}"
+            + "".join(f"\n    {violation}" for violation in violations)
+        )
+        if verbose:
+            for sql in budget.queries:
+                self.stdout.write(f"    {sql}")
+        return not violations
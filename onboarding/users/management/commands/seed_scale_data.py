@@ -0,0 +1,181 @@
+"""Fill the database with synthetic users and one time PINs."""
+import datetime
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from onboarding.users.management.commands.import_users import chunked
+from onboarding.users.models import MyUser, OneTimePin
+
+# Kenyan mobile numbers, +2547 followed by eight digits, are all valid.
+PHONE_NUMBERS = 10**8
+EMAIL_DOMAINS = ("example.com", "example.org", "example.net")
+
+
+class Identifiers:
+    """Distinct identifiers, the same for the same seed.
+
+    The n-th identifier is built from a seeded permutation of n, so any
+    range of them can be generated independently and never repeats.
+    Even numbers give emails and odd numbers E.164 phone numbers.
+    """
+
+    def __init__(self, seed: int):
+        """Draw the permutation from the seed."""
+        rng = random.Random(seed)
+        self.offset = rng.randrange(PHONE_NUMBERS)
+        self.step = rng.randrange(1, PHONE_NUMBERS)
+        while math.gcd(self.step, PHONE_NUMBERS) != 1:
+            self.step += 1
+
+    def __getitem__(self, number: int) -> tuple:
+        """Return the identifier and identifier type of a number."""
+        value = (self.step * number + self.offset) % PHONE_NUMBERS
+        if number % 2:
+            return f"+2547{value:08d}", "PHONE_NUMBER"
+        domain = EMAIL_DOMAINS[value % len(EMAIL_DOMAINS)]
+        return f"user{value:08d}@{domain}", "EMAIL"
+
+
+@contextmanager
+def relaxed_sqlite():
+    """Trade SQLite's crash safety for write speed while loading.
+
+    The pragmas cannot change inside a transaction, which is left as is.
+    """
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        (synchronous,) = cursor.fetchone()
+        cursor.execute("PRAGMA journal_mode")
+        (journal_mode,) = cursor.fetchone()
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {synchronous}")
+            cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let pins be inserted with their own `timestamp`."""
+    field = OneTimePin._meta.get_field("timestamp")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Insert synthetic rows for scale testing, in chunked bulk inserts.
+
+    Identifiers are generated from `--seed`, so runs with the same seed
+    and numbers produce the same identifiers, and rows that already exist
+    are skipped. Passwords come from a small pool, ``password0`` to
+    ``password<N-1>``, hashed once. Users joined over the last `--days`;
+    pins are issued to the first `--otps` users over the same period and
+    most of them were used.
+    """
+
+    help = "Generate users and one time PINs for scale testing."
+
+    def add_arguments(self, parser):
+        """Command line options."""
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument(
+            "--otps",
+            type=int,
+            default=0,
+            help="Pins to create, at most one per generated user.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="Number of the first identifier, to extend a dataset.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=10000)
+        parser.add_argument("--passwords", type=int, default=4)
+        parser.add_argument("--days", type=int, default=365)
+
+    def handle(self, *args, **options):
+        """Generate the users, then the pins."""
+        self.options = options
+        self.identifiers = Identifiers(options["seed"])
+        self.now = timezone.now()
+        count = min(options["otps"], options["users"])
+        with relaxed_sqlite():
+            self.load(MyUser, "users", self.users(), options["users"])
+            with explicit_timestamps():
+                self.load(OneTimePin, "pins", self.pins(count), count)
+
+    def numbers(self, count: int):
+        """Yield the identifier numbers with their age, oldest first."""
+        span = datetime.timedelta(days=self.options["days"])
+        for index in range(count):
+            age = span * (1 - index / max(count, 1))
+            yield self.options["start"] + index, self.now - age
+
+    def users(self):
+        """Yield the unsaved users."""
+        pool = [
+            make_password(f"password{index}")
+            for index in range(self.options["passwords"])
+        ]
+        for number, joined in self.numbers(self.options["users"]):
+            identifier, identifier_type = self.identifiers[number]
+            yield MyUser(
+                identifier=identifier,
+                identifier_type=identifier_type,
+                password=pool[number // 2 % len(pool)],
+                is_active=number % 50 != 0,
+                date_joined=joined,
+            )
+
+    def pins(self, count: int):
+        """Yield the unsaved pins, a quarter of them still unused."""
+        rng = random.Random(self.options["seed"])
+        for number, issued in self.numbers(count):
+            identifier, identifier_type = self.identifiers[number]
+            yield OneTimePin(
+                identifier=identifier,
+                identifier_type=identifier_type,
+                code=f"{rng.randrange(10**6):06d}",
+                timestamp=issued,
+                valid=number % 4 == 0,
+            )
+
+    def load(self, model, name: str, rows, total: int) -> None:
+        """Insert rows chunk by chunk, reporting the throughput."""
+        before = model.objects.count()
+        started = time.perf_counter()
+        written = 0
+        for chunk in chunked(rows, self.options["chunk_size"]):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, ignore_conflicts=True)
+            written += len(chunk)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name}: {written}/{total} rows "
+                f"({written / elapsed:.1f} rows/s)"
+            )
+
+        inserted = model.objects.count() - before
+        self.stdout.write(
+            f"Inserted {inserted} {name}, skipped {total - inserted} "
+            f"existing, in {time.perf_counter() - started:.3f}s"
+        )
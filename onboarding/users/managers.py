@@ -1,5 +1,18 @@
 """User app custom manager."""
+import datetime
+
+from django.conf import settings
 from django.contrib.auth.models import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, models, transaction
+from django.utils import timezone
+
+from onboarding.users.bloom import remember_identifiers
+from onboarding.users.hashing import hash_passwords
+from onboarding.users.identifiers import (
+    guess_identifier_type,
+    normalize_identifier,
+)
 
 
 class MyUserManager(BaseUserManager):
@@ -10,19 +23,103 @@ class MyUserManager(BaseUserManager):
         if not identifier or not identifier_type:
             raise ValueError("Users must have an identifier or its type")
 
-        match identifier_type:
-            case "EMAIL":
-                identifier = self.normalize_email(identifier)
-            case _:
-                pass
+        user = self.build_user(identifier, identifier_type)
+        user.set_password(password)
+        user.save(using=self._db)
+        return user
+
+    def get_by_natural_key(self, identifier):
+        """Look a user up by any spelling of their identifier, e.g. on login.
+
+        Identifiers that do not validate are looked up as given.
+        """
+        try:
+            identifier = normalize_identifier(
+                identifier, guess_identifier_type(identifier)
+            )
+        except ValidationError:
+            pass
+        return super().get_by_natural_key(identifier)
 
+    def build_user(self, identifier, identifier_type):
+        """Build an unsaved user with a normalized, valid identifier."""
         user = self.model(
             identifier=identifier,
             identifier_type=identifier_type,
         )
+        user.validate_identifier()
+        return user
+
+    def split_duplicates(self, users, passwords):
+        """Separate users whose identifier is taken or repeated.
+
+        Returns the new users, their passwords and the duplicate users,
+        using one query for the whole batch.
+        """
+        identifiers = [user.identifier for user in users]
+        seen = set(
+            self.filter(identifier__in=identifiers).values_list(
+                "identifier", flat=True
+            )
+        )
+        new, new_passwords, duplicates = [], [], []
+        for user, password in zip(users, passwords):
+            if user.identifier in seen:
+                duplicates.append(user)
+                continue
+            seen.add(user.identifier)
+            new.append(user)
+            new_passwords.append(password)
+        return new, new_passwords, duplicates
+
+    def bulk_register(self, users, passwords, executor=None):
+        """Insert validated users in bulk, skipping duplicates.
+
+        Passwords are hashed on the hashing pool (or `executor`) only for
+        users that will actually be inserted. Returns the created users,
+        with primary keys where the database reports them, and the
+        duplicates.
+        """
+        users, passwords, duplicates = self.split_duplicates(users, passwords)
+        for user, encoded in zip(users, hash_passwords(passwords, executor)):
+            user.password = encoded
+
+        try:
+            with transaction.atomic(using=self.db):
+                created = self.bulk_create(users)
+        except IntegrityError:
+            # Lost a race with a concurrent insert: recheck once.
+            users, _, raced = self.split_duplicates(users, users)
+            created, duplicates = self.bulk_create(users), duplicates + raced
+
+        # Bulk inserts skip post_save, which records single registrations.
+        remember_identifiers(user.identifier for user in created)
+        return created, duplicates
+
+    def register_user(self, identifier, identifier_type, password):
+        """Register a user with a single INSERT.
+
+        The identifier is validated and checked for duplicates before the
+        password is hashed, so a rejected sign-up costs neither a hash nor
+        a write. Raises ValidationError for invalid identifiers and
+        IntegrityError for taken ones.
+        """
+        user = self.build_user(identifier, identifier_type)
+        if self.filter(identifier=user.identifier).exists():
+            raise IntegrityError("user with the same identifier exists")
 
         user.set_password(password)
-        user.save(using=self._db)
+        user.save(force_insert=True, using=self._db)
+        return user
+
+    async def aregister_user(self, identifier, identifier_type, password):
+        """Register a user without blocking the event loop."""
+        user = self.build_user(identifier, identifier_type)
+        if await self.filter(identifier=user.identifier).aexists():
+            raise IntegrityError("user with the same identifier exists")
+
+        await user.aset_password(password)
+        await user.asave(force_insert=True, using=self._db)
         return user
 
     def create_superuser(self, identifier, identifier_type, password=None):
@@ -36,3 +133,154 @@ class MyUserManager(BaseUserManager):
         user.is_admin = True
         user.save(using=self._db)
         return user
+
+
+class PurgeableManager(models.Manager):
+    """Manager of rows deleted in batches once `stale`, oldest first."""
+
+    # Field ordering the stale rows from oldest to newest.
+    purge_order = "pk"
+
+    def stale(self):
+        """Rows that are no longer needed."""
+        raise NotImplementedError
+
+    def purge_batch(self, batch_size: int) -> int:
+        """Delete up to `batch_size` of the oldest stale rows.
+
+        The primary keys are selected first so the DELETE only touches a
+        bounded set of rows; they are checked again for staleness because
+        a row may have been updated in between. Returns the number of
+        deleted rows.
+        """
+        pks = (
+            self.stale()
+            .order_by(self.purge_order)
+            .values_list("pk", flat=True)
+        )
+        deleted, _ = (
+            self.stale().filter(pk__in=list(pks[:batch_size])).delete()
+        )
+        return deleted
+
+
+class OneTimePinManager(PurgeableManager):
+    """Custom one time PIN manager."""
+
+    purge_order = "timestamp"
+
+    UPSERT_SQL = (
+        "INSERT INTO {table} ({identifier}, {identifier_type}, {code}, "
+        "{timestamp}, {valid}) VALUES (%s, %s, %s, %s, %s) "
+        "ON CONFLICT ({identifier}) DO UPDATE SET "
+        "{identifier_type} = excluded.{identifier_type}, "
+        "{code} = excluded.{code}, "
+        "{timestamp} = excluded.{timestamp}, "
+        "{valid} = excluded.{valid} "
+        "WHERE {table}.{timestamp} <= %s"
+    )
+
+    CONSUME_SQL = (
+        "UPDATE {table} SET {valid} = CASE WHEN {timestamp} >= %s "
+        "THEN %s ELSE {valid} END "
+        "WHERE {code} = %s AND {identifier} = %s "
+        "AND {identifier_type} = %s AND {valid} = %s "
+        "RETURNING {valid}"
+    )
+
+    def _sql(self, template, connection):
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        return template.format(
+            table=quote(opts.db_table),
+            **{
+                name: quote(opts.get_field(name).column)
+                for name in (
+                    "identifier",
+                    "identifier_type",
+                    "code",
+                    "timestamp",
+                    "valid",
+                )
+            },
+        )
+
+    def _prep(self, field_name, value, connection):
+        field = self.model._meta.get_field(field_name)
+        return field.get_db_prep_value(value, connection)
+
+    def issue(self, identifier, identifier_type, code, cooldown) -> bool:
+        """Insert or replace the identifier's pin in a single statement.
+
+        An existing pin is only replaced when it is older than `cooldown`
+        seconds. Returns whether a pin was written. Relies on
+        ``INSERT ... ON CONFLICT``, available on SQLite and PostgreSQL.
+        """
+        connection = connections[self.db]
+        sql = self._sql(self.UPSERT_SQL, connection)
+        now = timezone.now()
+        not_after = now - datetime.timedelta(seconds=cooldown)
+        params = [
+            identifier,
+            identifier_type,
+            code,
+            self._prep("timestamp", now, connection),
+            self._prep("valid", True, connection),
+            self._prep("timestamp", not_after, connection),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount == 1
+
+    def consume(self, code, identifier, identifier_type, not_before) -> tuple:
+        """Consume an unused pin issued since `not_before`, in one UPDATE.
+
+        Returns whether the pin was consumed and whether it was unused but
+        expired instead. Only the call that flips `valid` gets the pin, so
+        concurrent verifications cannot both succeed. Relies on
+        ``UPDATE ... RETURNING``, available on SQLite and PostgreSQL.
+        """
+        connection = connections[self.db]
+        sql = self._sql(self.CONSUME_SQL, connection)
+        params = [
+            self._prep("timestamp", not_before, connection),
+            self._prep("valid", False, connection),
+            code,
+            identifier,
+            identifier_type,
+            self._prep("valid", True, connection),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return False, False
+        still_valid = bool(row[0])
+        return not still_valid, still_valid
+
+    def stale(self):
+        """Pins that can no longer be verified nor block a resend.
+
+        Pins are kept until both their validity window and their resend
+        cooldown are over, so purging them never lets an identifier skip
+        its cooldown.
+        """
+        age = max(
+            settings.OTP_VALIDITY_SECONDS, settings.OTP_RESEND_COOLDOWN_SECONDS
+        )
+        not_after = timezone.now() - datetime.timedelta(seconds=age)
+        return self.filter(timestamp__lt=not_after)
+
+
+class OutboxMessageManager(PurgeableManager):
+    """Outbox message manager."""
+
+    purge_order = "created"
+
+    def stale(self):
+        """Messages that were sent or given up on.
+
+        They still hold their plaintext code, so they are purged along
+        with the pins.
+        """
+        return self.exclude(status=self.model.PENDING)
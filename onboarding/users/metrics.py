@@ -0,0 +1,132 @@
+"""Prometheus metrics of the onboarding funnel.
+
+When `PROMETHEUS_MULTIPROC_DIR` is set before the app starts, as the
+entrypoint does for gunicorn, every worker writes its samples to
+memory-mapped files in that directory and `/metrics` aggregates them
+across all workers. Otherwise samples stay in process memory.
+"""
+import ipaddress
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from onboarding.users.instrumentation import SyncAndAsyncMiddleware
+
+REGISTRATIONS = Counter(
+    "onboarding_registrations_total",
+    "User registrations by result: created, duplicate or invalid.",
+    ["result"],
+)
+OTP_ISSUED = Counter(
+    "onboarding_otp_issued_total",
+    "One time PIN requests by result: issued or cooldown.",
+    ["result"],
+)
+OTP_VERIFICATIONS = Counter(
+    "onboarding_otp_verifications_total",
+    "One time PIN verifications by result: verified, failed or expired.",
+    ["result"],
+)
+AUTH_CACHE = Counter(
+    "onboarding_auth_cache_total",
+    "Token authentication cache lookups by result: hit or miss.",
+    ["result"],
+)
+REQUEST_LATENCY = Histogram(
+    "onboarding_request_duration_seconds",
+    "Request latency by view, method and status code.",
+    ["view", "method", "status"],
+)
+
+
+def count_verification(verified: bool, expired: bool = False) -> bool:
+    """Count an OTP verification by its outcome and return `verified`."""
+    result = "verified" if verified else "expired" if expired else "failed"
+    OTP_VERIFICATIONS.labels(result=result).inc()
+    return verified
+
+
+def get_registry():
+    """Registry to expose, aggregating the workers when multiprocess."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def parse_networks(networks) -> list:
+    """Parse addresses and networks, failing on invalid ones."""
+    try:
+        return [
+            ipaddress.ip_network(network.strip())
+            for network in networks
+            if network.strip()
+        ]
+    except ValueError as e:
+        raise ImproperlyConfigured(f"Invalid METRICS_ALLOWED_IPS: {e}")
+
+
+# Parsed once, so that a bad setting fails at startup.
+_scrapers = parse_networks(settings.METRICS_ALLOWED_IPS)
+
+
+@receiver(setting_changed)
+def reset_scrapers(setting, **kwargs):
+    """Parse the allowed scrapers again when their setting changes."""
+    if setting == "METRICS_ALLOWED_IPS":
+        _scrapers[:] = parse_networks(settings.METRICS_ALLOWED_IPS)
+
+
+def is_scraper(address: str) -> bool:
+    """Tell whether an address is in `METRICS_ALLOWED_IPS`."""
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in _scrapers)
+
+
+def metrics_view(request):
+    """Expose the metrics in the Prometheus text format to scrapers."""
+    if not is_scraper(request.META.get("REMOTE_ADDR", "")):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
+
+
+class MetricsMiddleware(SyncAndAsyncMiddleware):
+    """Observe the latency of every request, labelled by view name."""
+
+    def start(self, request) -> float:
+        """Start the clock."""
+        return time.perf_counter()
+
+    def stop(self, started: float) -> float:
+        """Return the time spent in the view."""
+        return time.perf_counter() - started
+
+    def report(self, request, response, duration: float):
+        """Record the request latency."""
+        match = request.resolver_match
+        REQUEST_LATENCY.labels(
+            view=match.view_name if match else "unmatched",
+            method=request.method,
+            status=response.status_code,
+        ).observe(duration)
+        return response
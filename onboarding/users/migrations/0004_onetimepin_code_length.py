@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_onetimepin"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="onetimepin",
+            name="code",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
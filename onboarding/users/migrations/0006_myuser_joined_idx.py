@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="myuser",
+            index=models.Index(
+                fields=["-date_joined", "-id"], name="users_myuser_joined_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_myuser_joined_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="onetimepin",
+            index=models.Index(
+                fields=["timestamp"], name="users_otp_timestamp_idx"
+            ),
+        ),
+    ]
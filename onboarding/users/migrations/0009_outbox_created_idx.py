@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_token_revocation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                fields=["created"], name="users_outbox_created_idx"
+            ),
+        ),
+    ]
@@ -1,18 +1,23 @@
 """Users app model instances."""
 import datetime
-import math
-import random
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AbstractBaseUser
-from django.core.validators import validate_email
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from phonenumber_field.validators import validate_international_phonenumber
 
 from config import settings
-from onboarding.users import IDENTIFIER_TYPE_CHOICES
-from onboarding.users.managers import MyUserManager
+from onboarding.users import IDENTIFIER_TYPE_CHOICES, hashing
+from onboarding.users.generators import get_code_generator
+from onboarding.users.identifiers import normalize_identifier
+from onboarding.users.instrumentation import timed
+from onboarding.users.managers import (
+    MyUserManager,
+    OneTimePinManager,
+    OutboxMessageManager,
+)
+from onboarding.users.providers import get_provider, render_OTP_message
 
 
 class AbstractBaseIdentifier(models.Model):
@@ -23,21 +28,39 @@ class AbstractBaseIdentifier(models.Model):
         max_length=255, choices=IDENTIFIER_TYPE_CHOICES
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the identifier loaded from the database."""
+        instance = super().from_db(db, field_names, values)
+        instance._stored_identifier = instance.__dict__.get("identifier")
+        instance._validated_identifier = (
+            instance.__dict__.get("identifier"),
+            instance.__dict__.get("identifier_type"),
+        )
+        return instance
+
     def validate_identifier(self) -> None:
-        """Validate the provided identifer, given their identifier type."""
-        match self.identifier_type:
-            case "PHONE_NUMBER":
-                validate_international_phonenumber(self.identifier)
+        """Validate and normalize the identifer, given its type.
+
+        Identifiers that were already validated, or loaded unchanged from
+        the database, are not validated again.
+        """
+        current = (self.identifier, self.identifier_type)
+        if current == getattr(self, "_validated_identifier", None):
+            return
 
-            case "EMAIL":
-                validate_email(self.identifier)
+        self.identifier = normalize_identifier(*current)
+        self._validated_identifier = (self.identifier, self.identifier_type)
 
-        return
+    def identifier_changed(self) -> bool:
+        """Tell whether the identifier differs from the stored one."""
+        return self.identifier != getattr(self, "_stored_identifier", None)
 
     def save(self, *args, **kwargs) -> None:
         """Override default save method."""
         self.validate_identifier()
-        return super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
+        self._stored_identifier = self.identifier
 
     class Meta:
         """Model meta options."""
@@ -74,64 +97,217 @@ class MyUser(AbstractBaseUser, AbstractBaseIdentifier):
         """Human readable representation of a user."""
         return self.identifier
 
+    def set_password(self, raw_password: str | None) -> None:
+        """Hash the password on the hashing pool."""
+        self.password = hashing.hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password: str) -> bool:
+        """Check the password on the hashing pool."""
+
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
+    async def aset_password(self, raw_password: str | None) -> None:
+        """Hash the password without blocking the event loop."""
+        self.password = await hashing.ahash_password(raw_password)
+        self._password = raw_password
+
+    async def acheck_password(self, raw_password: str) -> bool:
+        """Check the password without blocking the event loop."""
+
+        async def setter(raw_password):
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return await hashing.acheck_password(
+            raw_password, self.password, setter
+        )
+
+    class Meta:
+        """Model meta options."""
+
+        indexes = [
+            models.Index(
+                fields=["-date_joined", "-id"],
+                name="users_myuser_joined_idx",
+            ),
+        ]
+
 
 class OneTimePin(AbstractBaseIdentifier):
     """One time PIN used for user identifiers verification."""
 
     timestamp = models.DateTimeField(auto_now_add=True)
     valid = models.BooleanField(default=True)
-    code = models.CharField(max_length=6, null=True, blank=True)
+    code = models.CharField(max_length=16, null=True, blank=True)
+
+    objects = OneTimePinManager()
 
     def __str__(self) -> str:
         """Human readable representation of a user."""
         return self.code
 
+    class Meta:
+        """Model meta options."""
+
+        indexes = [
+            models.Index(
+                fields=["timestamp"],
+                name="users_otp_timestamp_idx",
+            ),
+        ]
+
     def generate_OTP(self) -> str:
         """Generate the OTP code."""
-        digits = "0123456789"
-        OTP = ""
-        for i in range(6):
-            OTP += digits[math.floor(random.random() * 10)]
-
-        return OTP
+        return get_code_generator().generate()
 
+    @timed("provider")
     def send_OTP(self) -> bool:
         """Send an OTP to the provided identifer."""
-        match self.identifier_type:
-            case "EMAIL":
-                raise NotImplementedError("Email Not Implemented")
-
-            case "PHONE_NUMBER":
-                raise NotImplementedError("SMS Not Implemented")
+        provider = get_provider(self.identifier_type)
+        (error,) = provider.send_batch(
+            [(self.identifier, render_OTP_message(self.code))]
+        )
+        return error is None
 
     def save(self, *args, **kwargs) -> None:
         """Override default save method."""
-        if not self.__class__.objects.filter(code=self.code):
-            OTP = self.generate_OTP()
-            self.code = OTP
+        if not self.code:
+            self.code = self.generate_OTP()
 
         super().save(*args, **kwargs)
 
 
+class OutboxMessage(models.Model):
+    """OTP delivery waiting to be handed to a provider."""
+
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    identifier = models.CharField(max_length=255)
+    identifier_type = models.CharField(
+        max_length=255, choices=IDENTIFIER_TYPE_CHOICES
+    )
+    code = models.CharField(max_length=16)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxMessageManager()
+
+    def __str__(self) -> str:
+        """Human readable representation of an outbox message."""
+        return f"{self.identifier} ({self.status})"
+
+    class Meta:
+        """Model meta options."""
+
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="users_outbox_pending_idx",
+            ),
+            # Purges and expiries walk the messages oldest first.
+            models.Index(fields=["created"], name="users_outbox_created_idx"),
+        ]
+
+
+class RevokedToken(models.Model):
+    """Refresh token revoked before it expired."""
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """Human readable representation of a revoked token."""
+        return self.jti
+
+    class Meta:
+        """Model meta options."""
+
+        indexes = [
+            models.Index(fields=["created"], name="users_revoked_created_idx"),
+        ]
+
+
+class TokenRevocation(models.Model):
+    """Time before which every token of a user is revoked."""
+
+    user = models.OneToOneField(
+        MyUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="token_revocation",
+    )
+    revoked_before = models.DateTimeField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        """Human readable representation of a revocation."""
+        return f"{self.user_id} before {self.revoked_before}"
+
+    class Meta:
+        """Model meta options."""
+
+        indexes = [
+            models.Index(
+                fields=["updated"], name="users_revocation_updated_idx"
+            ),
+        ]
+
+
+def _OTP_window_start():
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.OTP_VALIDITY_SECONDS
+    )
+
+
+def consume_OTP(code: str, identifier: str, identifier_type: str) -> tuple:
+    """Verify and consume an OTP code in a single conditional UPDATE.
+
+    The code is only valid if it is unused and still inside the validity
+    window. Returns whether it was verified and, if not, whether it was
+    an unused code past its window.
+    """
+    return OneTimePin.objects.consume(
+        code, identifier, identifier_type, not_before=_OTP_window_start()
+    )
+
+
+async def aconsume_OTP(
+    code: str, identifier: str, identifier_type: str
+) -> tuple:
+    """Verify and consume an OTP code from async code."""
+    return await sync_to_async(consume_OTP)(code, identifier, identifier_type)
+
+
 def verify_OTP(code: str, identifier: str, identifier_type: str) -> bool:
-    """Verfiy an OTP code."""
-    is_valid = False
-    now = timezone.now()
-    try:
-        OTP = OneTimePin.objects.get(
-            code=code,
-            valid=True,
-            identifier=identifier,
-            identifier_type=identifier_type,
-        )
-        if now <= OTP.timestamp + datetime.timedelta(
-            seconds=settings.OTP_VALIDITY_SECONDS
-        ):
-            is_valid = True
+    """Verify and consume an OTP code, see `consume_OTP`."""
+    verified, _ = consume_OTP(code, identifier, identifier_type)
+    return verified
 
-        OTP.valid = False
-        OTP.save()
-        return is_valid
 
-    except OneTimePin.DoesNotExist:
-        return False
+async def averify_OTP(
+    code: str, identifier: str, identifier_type: str
+) -> bool:
+    """Verify and consume an OTP code from async code."""
+    verified, _ = await aconsume_OTP(code, identifier, identifier_type)
+    return verified
@@ -0,0 +1,85 @@
+"""Users app pagination classes."""
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """Keyset pagination over users, newest first.
+
+    Cursors hold the `(date_joined, id)` pair of the user they stop at
+    and pages are filtered on that pair, backed by the `(date_joined, id)`
+    index. Every user has its own position, so no offsets are needed for
+    users that joined at the same time, and fetching any page costs the
+    same no matter how many users there are.
+    """
+
+    ordering = ("-date_joined", "-id")
+    page_size = settings.USERS_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.USERS_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Fetch the page following, or preceding, the cursor position."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request) or Cursor(0, False, None)
+        offset, reverse, position = self.cursor
+        queryset = self.beyond(queryset, position, reverse)
+        # One more user than the page tells whether another page follows.
+        stop = offset + self.page_size + 1
+        results = list(queryset[offset:stop])
+        self.page = results[: self.page_size]
+
+        ahead = self.following(results)
+        behind = (position is not None or offset > 0, position)
+        if reverse:
+            self.page.reverse()
+            ahead, behind = behind, ahead
+        self.has_next, self.next_position = ahead
+        self.has_previous, self.previous_position = behind
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def beyond(self, queryset, position, reverse: bool):
+        """Order the users away from `position` and keep those past it."""
+        if reverse:
+            queryset = queryset.order_by("date_joined", "id")
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is None:
+            return queryset
+
+        joined, pk = self.parse_position(position)
+        lookup = "gt" if reverse else "lt"
+        return queryset.filter(
+            Q(**{f"date_joined__{lookup}": joined})
+            | Q(date_joined=joined, **{f"id__{lookup}": pk})
+        )
+
+    def following(self, results: list) -> tuple:
+        """Tell whether a user follows the page, and its position."""
+        if len(results) <= self.page_size:
+            return False, None
+        return True, self._get_position_from_instance(results[-1], None)
+
+    def parse_position(self, position: str) -> tuple:
+        """Split a cursor position into its `date_joined` and id."""
+        try:
+            joined, pk = position.split(" ")
+            return datetime.datetime.fromisoformat(joined), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering) -> str:
+        if isinstance(instance, dict):
+            joined, pk = instance["date_joined"], instance["id"]
+        else:
+            joined, pk = instance.date_joined, instance.pk
+        return f"{joined.isoformat()} {pk}"
@@ -0,0 +1,274 @@
+"""One time PIN delivery providers."""
+import asyncio
+import logging
+import os
+import threading
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_providers = {}
+# Forked workers build their own providers; the parent's clients and
+# semaphores are bound to an event loop that does not run in the child.
+os.register_at_fork(after_in_child=_providers.clear)
+
+
+class BaseProvider:
+    """Interface implemented by every delivery provider.
+
+    Providers are instantiated once per process and per identifier type,
+    so they may keep connections open between batches. A forked child
+    instantiates its own.
+    """
+
+    def __init__(self, **options):
+        """Keep the provider options from the settings."""
+        self.options = options
+
+    def send_batch(self, messages: list) -> list:
+        """Send `(recipient, text)` pairs.
+
+        Returns one entry per message: None when it was accepted or an
+        error description when it should be retried.
+        """
+        raise NotImplementedError
+
+    async def asend_batch(self, messages: list) -> list:
+        """Send messages from async code."""
+        return await sync_to_async(self.send_batch)(messages)
+
+
+class LoggingProvider(BaseProvider):
+    """Log messages instead of sending them, for local development.
+
+    The codes are masked in the log, read them from the database. The
+    provider is refused by a system check unless `DEBUG` is on.
+    """
+
+    def send_batch(self, messages: list) -> list:
+        """Log every message, without its code."""
+        for recipient, text in messages:
+            logger.info("OTP for %s: %s", recipient, mask_OTP_message(text))
+        return [None] * len(messages)
+
+
+class LocalMemoryProvider(BaseProvider):
+    """Keep sent messages in memory, for tests."""
+
+    outbox = []
+
+    def send_batch(self, messages: list) -> list:
+        """Append every message to the class level outbox."""
+        self.outbox.extend(messages)
+        return [None] * len(messages)
+
+
+class _EventLoopThread:
+    """Event loop running in a daemon thread, shared by HTTP providers.
+
+    Connection pools are bound to the loop that created them, so every
+    provider call is scheduled on this single loop whether it comes from
+    sync code or from another event loop. A forked child starts its own.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="otp-providers",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the loop and return its future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+
+_event_loop_thread = _EventLoopThread()
+
+
+class HTTPProvider(BaseProvider):
+    """Deliver messages to a JSON HTTP API over a keep-alive pool.
+
+    All requests share one `httpx.AsyncClient`, so TLS connections are
+    reused across messages and batches, and at most `max_connections`
+    requests are in flight at once. When the API has a batch endpoint,
+    messages are submitted `batch_size` at a time.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        batch_url: str = None,
+        token: str = "",
+        max_connections: int = 10,
+        batch_size: int = 100,
+        timeout: float = 10.0,
+        **options,
+    ):
+        """Configure the API endpoints and the connection pool."""
+        super().__init__(**options)
+        self.url = url
+        self.batch_url = batch_url
+        self.token = token
+        self.max_connections = max_connections
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._client = None
+        self._semaphore = None
+
+    def payload(self, recipient: str, text: str) -> dict:
+        """Build the API payload of a single message."""
+        raise NotImplementedError
+
+    def batch_payload(self, payloads: list) -> dict:
+        """Build the API payload of a batch of messages."""
+        return {"messages": payloads}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        return self._client
+
+    async def _post(self, url: str, payload: dict) -> str | None:
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                return repr(e)
+        return None
+
+    async def _send_each(self, payloads: list) -> list:
+        return await asyncio.gather(
+            *(self._post(self.url, payload) for payload in payloads)
+        )
+
+    async def _send_batches(self, payloads: list) -> list:
+        chunks = [
+            payloads[start : start + self.batch_size]  # noqa: E203
+            for start in range(0, len(payloads), self.batch_size)
+        ]
+        errors = await asyncio.gather(
+            *(
+                self._post(self.batch_url, self.batch_payload(chunk))
+                for chunk in chunks
+            )
+        )
+        return [
+            error
+            for chunk, error in zip(chunks, errors)
+            for _ in range(len(chunk))
+        ]
+
+    async def _deliver(self, messages: list) -> list:
+        payloads = [self.payload(*message) for message in messages]
+        if self.batch_url:
+            return await self._send_batches(payloads)
+        return await self._send_each(payloads)
+
+    def send_batch(self, messages: list) -> list:
+        """Send messages over the shared connection pool."""
+        return _event_loop_thread.submit(self._deliver(messages)).result()
+
+    async def asend_batch(self, messages: list) -> list:
+        """Send messages over the shared pool without blocking the loop."""
+        future = _event_loop_thread.submit(self._deliver(messages))
+        return await asyncio.wrap_future(future)
+
+
+class SMSProvider(HTTPProvider):
+    """Send OTPs as text messages through an SMS gateway API."""
+
+    def __init__(self, sender: str = "", **options):
+        """Configure the sender ID shown on the text messages."""
+        super().__init__(**options)
+        self.sender = sender
+
+    def payload(self, recipient: str, text: str) -> dict:
+        """Build an SMS payload."""
+        return {"from": self.sender, "to": recipient, "message": text}
+
+
+class EmailProvider(HTTPProvider):
+    """Send OTPs as emails through a transactional email API."""
+
+    def __init__(
+        self,
+        sender: str = "",
+        subject: str = "Your one time PIN",
+        **options,
+    ):
+        """Configure the sender address and subject of the emails."""
+        super().__init__(**options)
+        self.sender = sender
+        self.subject = subject
+
+    def payload(self, recipient: str, text: str) -> dict:
+        """Build an email payload."""
+        return {
+            "from": self.sender,
+            "to": recipient,
+            "subject": self.subject,
+            "text": text,
+        }
+
+
+def get_provider(identifier_type: str) -> BaseProvider:
+    """Return the shared provider configured for an identifier type."""
+    if identifier_type not in _providers:
+        config = settings.OTP_PROVIDERS[identifier_type]
+        backend = import_string(config["BACKEND"])
+        _providers[identifier_type] = backend(**config.get("OPTIONS", {}))
+
+    return _providers[identifier_type]
+
+
+def render_OTP_message(code: str) -> str:
+    """Render the text sent along with an OTP code."""
+    return settings.OTP_MESSAGE.format(code=code)
+
+
+def mask_OTP_message(text: str) -> str:
+    """Hide the code of a rendered OTP message, e.g. for logging."""
+    prefix, _, suffix = settings.OTP_MESSAGE.partition("{code}")
+    code_length = len(text) - len(prefix) - len(suffix)
+    if code_length < 0 or not text.startswith(prefix):
+        return "<message hidden>"
+    if suffix and not text.endswith(suffix):
+        return "<message hidden>"
+    return prefix + "*" * code_length + suffix
+
+
+@receiver(setting_changed)
+def reset_providers(setting, **kwargs):
+    """Drop cached providers when their settings change."""
+    if setting == "OTP_PROVIDERS":
+        _providers.clear()
@@ -0,0 +1,285 @@
+"""Database query budgets.
+
+`query_budget` fails a block, or a decorated function, that runs more
+queries than allowed or touches tables it is not expected to.
+`ENDPOINT_BUDGETS` holds the budget of every API endpoint, checked by
+the test suite and reported by ``manage.py query_budgets``.
+
+Endpoints are measured in their steady state: a first request warms up
+the caches (token lookups, the identifier filter, the token denylist)
+and a second, similar one is counted. Savepoint statements are left out
+of the counts, so that they do not depend on running in a transaction.
+"""
+import re
+from contextlib import ContextDecorator
+
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from onboarding.users.delivery import issue_OTP
+from onboarding.users.models import MyUser
+from onboarding.users.tokens import ClaimsRefreshToken
+
+TABLE = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+"(\w+)"', re.IGNORECASE)
+SAVEPOINT = re.compile(r"^(RELEASE |ROLLBACK TO )?SAVEPOINT", re.IGNORECASE)
+
+USERS = "users_myuser"
+OTPS = "users_onetimepin"
+OUTBOX = "users_outboxmessage"
+TOKENS = "authtoken_token"
+
+# Allowed queries and tables of every endpoint, by URL name and method.
+# Identifiers missing from the identifier filter are answered without a
+# query.
+ENDPOINT_BUDGETS = {
+    ("user-list", "get"): (1, {USERS}),
+    ("user-list", "post"): (2, {USERS}),
+    ("user-detail", "get"): (1, {USERS}),
+    # Saving a user looks its tokens up to drop them from the auth cache.
+    ("user-detail", "put"): (4, {USERS, TOKENS}),
+    ("user-detail", "patch"): (4, {USERS, TOKENS}),
+    ("user-detail", "delete"): (
+        5,
+        {USERS, TOKENS, "django_admin_log", "users_tokenrevocation"},
+    ),
+    ("user-register", "post"): (2, {USERS}),
+    ("user-register-batch", "post"): (2, {USERS}),
+    ("user-available", "get"): (0, {USERS}),
+    ("user-export", "get"): (1, {USERS}),
+    ("user-otp", "post"): (2, {OTPS, OUTBOX}),
+    ("user-verify-otp", "post"): (1, {OTPS}),
+    ("user-logout", "post"): (2, {"users_revokedtoken"}),
+    ("user-revoke-tokens", "post"): (
+        4,
+        {USERS, TOKENS, "users_tokenrevocation"},
+    ),
+    ("token_obtain_pair", "post"): (1, {USERS}),
+    ("token_refresh", "post"): (0, set()),
+    ("async-user-register", "post"): (2, {USERS}),
+    ("async-user-otp", "post"): (2, {OTPS, OUTBOX}),
+    ("async-user-verify-otp", "post"): (1, {OTPS}),
+    ("metrics", "get"): (0, set()),
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Code ran more queries or touched more tables than budgeted."""
+
+
+class query_budget(ContextDecorator):
+    """Fail when the block runs over its query and table budget.
+
+    Use as ``with query_budget(2, {"users_myuser"}):`` or as a decorator.
+    Leave `tables` out to only count queries.
+    """
+
+    def __init__(self, queries: int, tables=None, using=DEFAULT_DB_ALIAS):
+        """Set the budget, for queries on the `using` database."""
+        self.max_queries = queries
+        self.allowed_tables = None if tables is None else set(tables)
+        self.capture = CaptureQueriesContext(connections[using])
+
+    def __enter__(self):
+        """Start recording queries."""
+        self.capture.__enter__()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        """Stop recording and check the budget."""
+        self.capture.__exit__(exc_type, *exc_info)
+        if exc_type is None:
+            self.check()
+
+    @property
+    def queries(self) -> list:
+        """SQL of the recorded queries, savepoints aside."""
+        statements = (query["sql"] for query in self.capture.captured_queries)
+        return [sql for sql in statements if not SAVEPOINT.match(sql)]
+
+    @property
+    def tables(self) -> set:
+        """Tables touched by the recorded queries."""
+        return {table for sql in self.queries for table in TABLE.findall(sql)}
+
+    def violations(self) -> list:
+        """Describe how the recorded queries went over the budget."""
+        found = []
+        if len(self.queries) > self.max_queries:
+            found.append(
+                f"{len(self.queries)} queries, over the budget of "
+                f"{self.max_queries}"
+            )
+        if self.allowed_tables is not None:
+            unexpected = sorted(self.tables - self.allowed_tables)
+            if unexpected:
+                found.append(f"unexpected tables {', '.join(unexpected)}")
+        return found
+
+    def check(self) -> None:
+        """Raise `QueryBudgetExceeded` if the budget was exceeded."""
+        found = self.violations()
+        if found:
+            raise QueryBudgetExceeded(
+                "; ".join(found) + "\n" + "\n".join(self.queries)
+            )
+
+
+def _identity(index: int) -> dict:
+    return {
+        "identifier": f"budget{index}@example.com",
+        "identifier_type": "EMAIL",
+    }
+
+
+def _registration(index: int) -> dict:
+    return {
+        **_identity(index),
+        "password": "secret",
+        "confirm_password": "secret",
+    }
+
+
+def _user(index: int) -> MyUser:
+    return MyUser.objects.create_user(password="secret", **_identity(index))
+
+
+def _refresh(index: int) -> dict:
+    return {"refresh": str(ClaimsRefreshToken.for_user(_user(index)))}
+
+
+def _verification(index: int) -> dict:
+    identity = _identity(index)
+    code = issue_OTP(identity["identifier"], identity["identifier_type"])
+    return {**identity, "code": code}
+
+
+def _detail(name: str, index: int) -> str:
+    return reverse(name, args=[_user(index).pk])
+
+
+def _user_data(index: int) -> dict:
+    return {**_identity(index), "password": "secret"}
+
+
+# Request of the n-th call of every endpoint, as (path, data). Anything
+# the request relies on is created first, outside of the count.
+SCENARIOS = {
+    ("user-list", "get"): lambda n: (reverse("user-list"), None),
+    ("user-list", "post"): lambda n: (reverse("user-list"), _user_data(n)),
+    ("user-detail", "get"): lambda n: (_detail("user-detail", n), None),
+    ("user-detail", "put"): lambda n: (
+        _detail("user-detail", n),
+        _user_data(n + 100),
+    ),
+    ("user-detail", "patch"): lambda n: (
+        _detail("user-detail", n),
+        {"identifier": _identity(n + 100)["identifier"]},
+    ),
+    ("user-detail", "delete"): lambda n: (_detail("user-detail", n), None),
+    ("user-register", "post"): lambda n: (
+        reverse("user-register"),
+        _registration(n),
+    ),
+    ("user-register-batch", "post"): lambda n: (
+        reverse("user-register-batch"),
+        [_registration(2 * n), _registration(2 * n + 1)],
+    ),
+    ("user-available", "get"): lambda n: (
+        reverse("user-available"),
+        {"identifier": _identity(n)["identifier"]},
+    ),
+    ("user-export", "get"): lambda n: (reverse("user-export"), None),
+    ("user-otp", "post"): lambda n: (reverse("user-otp"), _identity(n)),
+    ("user-verify-otp", "post"): lambda n: (
+        reverse("user-verify-otp"),
+        _verification(n),
+    ),
+    ("user-logout", "post"): lambda n: (reverse("user-logout"), _refresh(n)),
+    ("user-revoke-tokens", "post"): lambda n: (
+        _detail("user-revoke-tokens", n),
+        None,
+    ),
+    ("token_obtain_pair", "post"): lambda n: (
+        reverse("token_obtain_pair"),
+        {"identifier": _user(n).identifier, "password": "secret"},
+    ),
+    ("token_refresh", "post"): lambda n: (
+        reverse("token_refresh"),
+        _refresh(n),
+    ),
+    ("async-user-register", "post"): lambda n: (
+        reverse("async-user-register"),
+        _registration(n),
+    ),
+    ("async-user-otp", "post"): lambda n: (
+        reverse("async-user-otp"),
+        _identity(n),
+    ),
+    ("async-user-verify-otp", "post"): lambda n: (
+        reverse("async-user-verify-otp"),
+        _verification(n),
+    ),
+    ("metrics", "get"): lambda n: (reverse("metrics"), None),
+}
+
+
+class EndpointClient:
+    """Send scenario requests as a staff API user."""
+
+    def __init__(self):
+        """Create the API user and its token."""
+        user = MyUser.objects.create_user(
+            identifier="budget-staff@example.com", identifier_type="EMAIL"
+        )
+        MyUser.objects.filter(pk=user.pk).update(is_staff=True)
+        self.token = Token.objects.create(user=user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+
+    def send(self, name: str, method: str, path: str, data):
+        """Send a request to an endpoint and read all of its response."""
+        if name.startswith("async-"):
+            response = self.send_async(method, path, data)
+        elif method == "get":
+            response = self.client.get(path, data)
+        else:
+            send = getattr(self.client, method)
+            response = send(path, data, format="json")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    def send_async(self, method: str, path: str, data):
+        """Send a JSON request through the ASGI handler."""
+
+        async def send():
+            return await getattr(AsyncClient(), method)(
+                path,
+                data,
+                content_type="application/json",
+                headers={"Authorization": f"Token {self.token}"},
+            )
+
+        return async_to_sync(send)()
+
+
+def measure_endpoint(name: str, method: str) -> tuple:
+    """Count the queries of an endpoint against its budget.
+
+    Returns the `query_budget` that recorded the request, unchecked, and
+    the response.
+    """
+    client = EndpointClient()
+    scenario = SCENARIOS[name, method]
+    client.send(name, method, *scenario(0))
+
+    request = scenario(1)
+    budget = query_budget(*ENDPOINT_BUDGETS[name, method])
+    with budget.capture:
+        response = client.send(name, method, *request)
+    return budget, response
@@ -0,0 +1,146 @@
+"""JSON web token revocation.
+
+Revocations are stored in the database and mirrored in an in-memory
+denylist that every process synchronizes incrementally, at most every
+`TOKEN_DENYLIST_SYNC_SECONDS`. Checking a token is a set and a dict
+lookup, so refreshing stays query free between synchronizations.
+Revocations made in a process apply to it immediately; other processes
+pick them up at their next synchronization.
+"""
+import datetime
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from onboarding.users.models import RevokedToken, TokenRevocation
+
+# Rows are read again for this long after a synchronization, so rows
+# committed late by slow transactions are not missed.
+SYNC_OVERLAP = datetime.timedelta(seconds=30)
+
+
+class _Denylist:
+    """Per process mirror of the revocation tables.
+
+    Only revocations of tokens that have not expired yet are kept: revoked
+    token ids with their expiry, and per user the time before which their
+    tokens are revoked.
+    """
+
+    def __init__(self):
+        """Start empty, the first check loads the tables."""
+        self.jtis = {}
+        self.users = {}
+        self.pid = None
+        self.since = None
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+
+    def due(self) -> bool:
+        """Tell whether the tables should be read again."""
+        age = time.monotonic() - self.synced_at
+        return (
+            self.pid != os.getpid()
+            or age > settings.TOKEN_DENYLIST_SYNC_SECONDS
+        )
+
+    def get(self):
+        """Return the denylist, synchronizing it when due."""
+        if self.due():
+            with self.lock:
+                if self.due():
+                    self.sync()
+        return self
+
+    def sync(self) -> None:
+        """Read the revocations made since the last synchronization."""
+        now = timezone.now()
+        horizon = now - api_settings.REFRESH_TOKEN_LIFETIME
+        if self.pid != os.getpid():
+            self.jtis, self.users, self.since = {}, {}, None
+        since = self.since - SYNC_OVERLAP if self.since else horizon
+
+        tokens = RevokedToken.objects.filter(
+            created__gte=since, expires_at__gt=now
+        ).values_list("jti", "expires_at")
+        users = TokenRevocation.objects.filter(
+            updated__gte=since, revoked_before__gt=horizon
+        ).values_list("user_id", "revoked_before")
+        self.prune(now.timestamp(), horizon.timestamp())
+        for jti, expires_at in tokens:
+            self.jtis[jti] = expires_at.timestamp()
+        for user_id, revoked_before in users:
+            self.revoke_user(user_id, revoked_before.timestamp())
+
+        self.pid, self.since = os.getpid(), now
+        self.synced_at = time.monotonic()
+
+    def prune(self, now: float, horizon: float) -> None:
+        """Forget revocations of tokens that expired anyway."""
+        self.jtis = {
+            jti: expires for jti, expires in self.jtis.items() if expires > now
+        }
+        self.users = {
+            user: before
+            for user, before in self.users.items()
+            if before > horizon
+        }
+
+    def revoke_user(self, user_id: int, before: float) -> None:
+        """Revoke the user's tokens issued before the timestamp."""
+        self.users[user_id] = max(before, self.users.get(user_id, 0.0))
+
+    def is_revoked(self, payload: dict) -> bool:
+        """Tell whether a token payload was revoked."""
+        if payload.get(api_settings.JTI_CLAIM) in self.jtis:
+            return True
+        before = self.users.get(payload.get(api_settings.USER_ID_CLAIM))
+        # `iat` has a one second resolution: tokens issued in the second of
+        # the revocation are revoked too.
+        return before is not None and payload.get("iat", 0) <= int(before)
+
+
+_denylist = _Denylist()
+
+
+def is_revoked(payload: dict) -> bool:
+    """Tell whether a token payload was revoked, without a query."""
+    return _denylist.get().is_revoked(payload)
+
+
+def revoke_token(token) -> None:
+    """Revoke a single token, e.g. a refresh token on logout."""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime_from_epoch(token["exp"])
+    RevokedToken.objects.get_or_create(
+        jti=jti, defaults={"expires_at": expires_at}
+    )
+    with _denylist.lock:
+        _denylist.jtis[jti] = expires_at.timestamp()
+
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Revoke every token issued to the user so far.
+
+    This covers refresh and access tokens as well as the user's DRF
+    authentication tokens, which are deleted.
+    """
+    now = timezone.now()
+    TokenRevocation.objects.update_or_create(
+        user_id=user_id, defaults={"revoked_before": now}
+    )
+    Token.objects.filter(user_id=user_id).delete()
+    with _denylist.lock:
+        _denylist.revoke_user(user_id, now.timestamp())
+
+
+def reset_denylist() -> None:
+    """Drop the in-memory denylist, it is reloaded on the next check."""
+    global _denylist
+    _denylist = _Denylist()
@@ -1,19 +1,133 @@
 """User app serializers."""
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
+from onboarding.users import IDENTIFIER_TYPE_CHOICES
+from onboarding.users.identifiers import (
+    guess_identifier_type,
+    normalize_identifier,
+)
+from onboarding.users.instrumentation import TimedSerializerMixin
 from onboarding.users.models import MyUser, OneTimePin
 
 
-class UserRegistrationSerializer(serializers.Serializer):
+class NormalizedIdentifierMixin:
+    """Validate and normalize the identifier of the payload."""
+
+    def validate(self, attrs):
+        """Replace the identifier with its canonical form."""
+        try:
+            attrs["identifier"] = normalize_identifier(
+                attrs["identifier"], attrs["identifier_type"]
+            )
+        except ValidationError as e:
+            raise serializers.ValidationError({"identifier": e.messages})
+        return super().validate(attrs)
+
+
+class UserRegistrationSerializer(
+    TimedSerializerMixin,
+    NormalizedIdentifierMixin,
+    serializers.Serializer,
+):
     """Custom user registration serializer."""
 
     identifier = serializers.CharField(max_length=255)
-    identifier_type = serializers.CharField(max_length=255)
+    identifier_type = serializers.ChoiceField(choices=IDENTIFIER_TYPE_CHOICES)
     password = serializers.CharField(max_length=255)
     confirm_password = serializers.CharField(max_length=255)
 
 
-class MyUserSerializer(serializers.ModelSerializer):
+class IdentifierAvailabilitySerializer(
+    TimedSerializerMixin,
+    NormalizedIdentifierMixin,
+    serializers.Serializer,
+):
+    """Identifier availability query.
+
+    The identifier type is inferred from the identifier when omitted.
+    """
+
+    identifier = serializers.CharField(max_length=255)
+    identifier_type = serializers.ChoiceField(
+        choices=IDENTIFIER_TYPE_CHOICES, required=False
+    )
+
+    def validate(self, attrs):
+        """Infer the identifier type before normalizing."""
+        attrs.setdefault(
+            "identifier_type", guess_identifier_type(attrs["identifier"])
+        )
+        return super().validate(attrs)
+
+
+class BatchRegistrationSerializer(
+    TimedSerializerMixin, serializers.Serializer
+):
+    """Envelope of a batch of registrations.
+
+    Only the shape of the batch is checked here; every registration is
+    validated on its own so that one bad item does not reject the rest.
+    """
+
+    users = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.REGISTER_BATCH_MAX_SIZE,
+    )
+
+
+class LogoutSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Refresh token to revoke on logout."""
+
+    refresh = serializers.CharField()
+
+
+class MyUserListSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Read only user representation for listings.
+
+    Works on `.values()` rows as well as instances. Pass `fields` to
+    only keep some of the fields.
+    """
+
+    identifier = serializers.CharField(read_only=True)
+    identifier_type = serializers.CharField(read_only=True)
+    is_active = serializers.BooleanField(read_only=True)
+    is_staff = serializers.BooleanField(read_only=True)
+    date_joined = serializers.DateTimeField(read_only=True)
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """Drop the fields that were not selected."""
+        super().__init__(*args, **kwargs)
+        for name in set(self.fields) - set(fields or self.fields):
+            self.fields.pop(name)
+
+    @classmethod
+    def select(cls, selection: str | None) -> list:
+        """Parse a comma separated field selection, ignoring unknowns."""
+        known = list(cls._declared_fields)
+        if not selection:
+            return known
+        requested = selection.split(",")
+        return [name for name in known if name in requested] or known
+
+
+class UserExportFilterSerializer(TimedSerializerMixin, serializers.Serializer):
+    """User export options."""
+
+    date_joined_after = serializers.DateTimeField(required=False)
+    date_joined_before = serializers.DateTimeField(required=False)
+    identifier_type = serializers.ChoiceField(
+        choices=IDENTIFIER_TYPE_CHOICES, required=False
+    )
+    is_active = serializers.BooleanField(allow_null=True, default=None)
+    output = serializers.ChoiceField(
+        choices=["ndjson", "csv"], default="ndjson"
+    )
+
+
+class MyUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """MyUser model serializer class."""
 
     class Meta:
@@ -23,7 +137,11 @@ class MyUserSerializer(serializers.ModelSerializer):
         fields = ("identifier", "identifier_type", "password")
 
 
-class OneTimePinSerializer(serializers.ModelSerializer):
+class OneTimePinSerializer(
+    TimedSerializerMixin,
+    NormalizedIdentifierMixin,
+    serializers.ModelSerializer,
+):
     """OTP model serializer."""
 
     class Meta:
@@ -31,11 +149,17 @@ class OneTimePinSerializer(serializers.ModelSerializer):
 
         model = OneTimePin
         fields = ("identifier", "identifier_type")
+        # Issuing a pin for a known identifier replaces it instead.
+        extra_kwargs = {"identifier": {"validators": []}}
 
 
-class OneTimePinVerificationSerializer(serializers.Serializer):
+class OneTimePinVerificationSerializer(
+    TimedSerializerMixin,
+    NormalizedIdentifierMixin,
+    serializers.Serializer,
+):
     """One Time PIn verification serializer."""
 
     identifier = serializers.CharField(max_length=255)
-    identifier_type = serializers.CharField(max_length=255)
-    code = serializers.CharField(max_length=6)
+    identifier_type = serializers.ChoiceField(choices=IDENTIFIER_TYPE_CHOICES)
+    code = serializers.CharField(max_length=16)
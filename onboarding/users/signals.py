@@ -0,0 +1,34 @@
+"""Users app signal receivers."""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from onboarding.users.authentication import forget_tokens
+from onboarding.users.bloom import remember_identifiers
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a deleted token."""
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user_tokens(sender, instance, created, **kwargs):
+    """Refresh cached snapshots of a user that was changed."""
+    if not created:
+        forget_tokens(
+            Token.objects.filter(user=instance).values_list("key", flat=True)
+        )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def remember_user_identifier(sender, instance, created, **kwargs):
+    """Tell availability checks that a new identifier is taken.
+
+    Saves that keep the identifier add nothing, so they do not fill the
+    filter up and trigger early rebuilds.
+    """
+    if created or instance.identifier_changed():
+        remember_identifiers([instance.identifier])
@@ -0,0 +1,140 @@
+"""One time PIN storage backends."""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from onboarding.users.generators import get_code_generator
+from onboarding.users.metrics import count_verification
+from onboarding.users.models import OneTimePin, aconsume_OTP, consume_OTP
+
+
+class BaseOTPStore:
+    """Interface implemented by every OTP storage backend."""
+
+    def issue(self, identifier: str, identifier_type: str) -> str | None:
+        """Issue a new OTP for the identifier and return its code.
+
+        Returns None when the identifier is still in its resend cooldown.
+        """
+        raise NotImplementedError
+
+    def verify(self, code: str, identifier: str, identifier_type: str) -> bool:
+        """Verify and consume an OTP code."""
+        raise NotImplementedError
+
+    async def averify(
+        self, code: str, identifier: str, identifier_type: str
+    ) -> bool:
+        """Verify and consume an OTP code from async code."""
+        return await sync_to_async(self.verify)(
+            code, identifier, identifier_type
+        )
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    """Keep OTPs as `OneTimePin` rows."""
+
+    def issue(self, identifier: str, identifier_type: str) -> str | None:
+        """Insert or replace the identifier's `OneTimePin` row."""
+        code = get_code_generator().generate()
+        issued = OneTimePin.objects.issue(
+            identifier,
+            identifier_type,
+            code,
+            cooldown=settings.OTP_RESEND_COOLDOWN_SECONDS,
+        )
+        return code if issued else None
+
+    def verify(self, code: str, identifier: str, identifier_type: str) -> bool:
+        """Verify the code against the `OneTimePin` table."""
+        return count_verification(
+            *consume_OTP(code, identifier, identifier_type)
+        )
+
+    async def averify(
+        self, code: str, identifier: str, identifier_type: str
+    ) -> bool:
+        """Verify the code from async code."""
+        return count_verification(
+            *await aconsume_OTP(code, identifier, identifier_type)
+        )
+
+
+class CacheOTPStore(BaseOTPStore):
+    """Keep OTPs in a Django cache, letting the cache expire them.
+
+    Every code lives under its own counter key, so verification is a
+    single atomic ``incr`` and only the caller that moves the counter
+    from zero to one wins. A per-identifier pointer lets a newly issued
+    code revoke the previous one. The cache forgets expired codes, so
+    verifying one counts as a plain failure in the metrics.
+    """
+
+    def __init__(self):
+        """Bind the store to the configured cache alias."""
+        self.cache = caches[settings.OTP_CACHE_ALIAS]
+
+    def _identifier_key(self, identifier: str, identifier_type: str) -> str:
+        return f"otp:{identifier_type}:{identifier}"
+
+    def _code_key(
+        self, code: str, identifier: str, identifier_type: str
+    ) -> str:
+        return f"otp:{identifier_type}:{identifier}:{code}"
+
+    def issue(self, identifier: str, identifier_type: str) -> str | None:
+        """Store a fresh code, revoking any previously issued one."""
+        cooling_down = not self.cache.add(
+            f"otp:cooldown:{identifier_type}:{identifier}",
+            True,
+            timeout=settings.OTP_RESEND_COOLDOWN_SECONDS,
+        )
+        if cooling_down:
+            return None
+
+        pointer = self._identifier_key(identifier, identifier_type)
+        previous = self.cache.get(pointer)
+        if previous is not None:
+            self.cache.delete(
+                self._code_key(previous, identifier, identifier_type)
+            )
+
+        code = get_code_generator().generate()
+        self.cache.set_many(
+            {
+                pointer: code,
+                self._code_key(code, identifier, identifier_type): 0,
+            },
+            timeout=settings.OTP_VALIDITY_SECONDS,
+        )
+        return code
+
+    def verify(self, code: str, identifier: str, identifier_type: str) -> bool:
+        """Atomically consume the code, failing if it is unknown."""
+        try:
+            uses = self.cache.incr(
+                self._code_key(code, identifier, identifier_type)
+            )
+        except ValueError:
+            return count_verification(False)
+
+        return count_verification(uses == 1)
+
+    async def averify(
+        self, code: str, identifier: str, identifier_type: str
+    ) -> bool:
+        """Consume the code with the cache's async API."""
+        try:
+            uses = await self.cache.aincr(
+                self._code_key(code, identifier, identifier_type)
+            )
+        except ValueError:
+            return count_verification(False)
+
+        return count_verification(uses == 1)
+
+
+def get_otp_store() -> BaseOTPStore:
+    """Return an instance of the configured OTP store."""
+    return import_string(settings.OTP_STORE)()
@@ -0,0 +1,159 @@
+"""Request throttles backed by sliding window counters."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from rest_framework.throttling import SimpleRateThrottle
+
+from onboarding.users.identifiers import normalize_identifier
+
+# A bucket counter carries the final count of the bucket before it in its
+# high bits, so a single ``incr`` returns both counts.
+SHIFT = 32
+MASK = (1 << SHIFT) - 1
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Approximate a sliding window with two fixed window buckets.
+
+    Requests are counted in buckets as long as the rate's period, and the
+    rate over the last period is estimated as the current bucket's count
+    plus the previous bucket's count, weighted by how much of it is still
+    inside the window. Rejected requests are counted too, so a client
+    that keeps hammering stays throttled.
+
+    The scope is ``<view action>_<kind>`` and its rate is read from the
+    `THROTTLE_RATES` setting; scopes without a rate are not throttled.
+    A request costs a single atomic ``incr``, except the first one of a
+    bucket which also reads the previous bucket.
+    """
+
+    kind = None
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        """Defer picking the rate until the view is known."""
+
+    @property
+    def cache(self):
+        """Cache holding the counters."""
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_rate(self):
+        """Read the rate of the scope from the settings."""
+        return settings.THROTTLE_RATES.get(self.scope)
+
+    def identify(self, request) -> str | None:
+        """Identify who the request is counted against."""
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        """Pick the scope from the view and build the counter key."""
+        self.scope = f"{view.action}_{self.kind}"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        ident = self.identify(request) if self.rate else None
+        if ident is None:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def bucket(self) -> int:
+        """Start the clock and return the current bucket number."""
+        self.now = self.timer()
+        return int(self.now // self.duration)
+
+    def allow_request(self, request, view):
+        """Count the request and tell whether it is under the rate."""
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        bucket = self.bucket()
+        return self.evaluate(bucket, self.hit(key, bucket))
+
+    async def aallow_request(self, request, view):
+        """Count the request with the cache's async API."""
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        bucket = self.bucket()
+        return self.evaluate(bucket, await self.ahit(key, bucket))
+
+    def hit(self, key: str, bucket: int) -> int:
+        """Increment the bucket counter, opening it if needed."""
+        try:
+            return self.cache.incr(f"{key}:{bucket}")
+        except ValueError:
+            return self.open_bucket(key, bucket)
+
+    def open_bucket(self, key: str, bucket: int) -> int:
+        """Start a bucket with the final count of the previous one."""
+        previous = self.cache.get(f"{key}:{bucket - 1}", 0) & MASK
+        value = (previous << SHIFT) + 1
+        if self.cache.add(f"{key}:{bucket}", value, 2 * self.duration):
+            return value
+        return self.cache.incr(f"{key}:{bucket}")
+
+    async def ahit(self, key: str, bucket: int) -> int:
+        """Increment the bucket counter from async code."""
+        try:
+            return await self.cache.aincr(f"{key}:{bucket}")
+        except ValueError:
+            return await self.aopen_bucket(key, bucket)
+
+    async def aopen_bucket(self, key: str, bucket: int) -> int:
+        """Start a bucket from async code."""
+        previous = await self.cache.aget(f"{key}:{bucket - 1}", 0) & MASK
+        value = (previous << SHIFT) + 1
+        if await self.cache.aadd(f"{key}:{bucket}", value, 2 * self.duration):
+            return value
+        return await self.cache.aincr(f"{key}:{bucket}")
+
+    def evaluate(self, bucket: int, value: int) -> bool:
+        """Estimate the rate over the sliding window."""
+        self.previous, self.current = value >> SHIFT, value & MASK
+        self.elapsed = self.now - bucket * self.duration
+        weight = 1 - self.elapsed / self.duration
+        return self.previous * weight + self.current <= self.num_requests
+
+    def wait(self):
+        """Seconds until the estimate falls back to the rate."""
+        if self.current > self.num_requests:
+            # The current bucket alone is over: wait for the next bucket
+            # and for enough of this one to slide out of the window.
+            decay = 1 - self.num_requests / self.current
+            return self.duration * (1 + decay) - self.elapsed
+        available = (self.num_requests - self.current) / self.previous
+        return self.duration * (1 - available) - self.elapsed
+
+
+class IdentifierRateThrottle(SlidingWindowThrottle):
+    """Throttle by the identifier in the request body.
+
+    Identifiers are normalized first, so spelling a phone number or an
+    email address differently does not reset the count. Invalid ones are
+    left to the IP throttle; the serializer rejects them anyway.
+    """
+
+    kind = "identifier"
+
+    def identify(self, request) -> str | None:
+        """Use the normalized identifier of the payload."""
+        data = request.data
+        if not isinstance(data, dict):
+            return None
+        try:
+            return normalize_identifier(
+                str(data.get("identifier", "")),
+                str(data.get("identifier_type", "")),
+            )
+        except ValidationError:
+            return None
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Throttle by the client IP address."""
+
+    kind = "ip"
+
+    def identify(self, request) -> str:
+        """Use the client IP, honouring DRF's `NUM_PROXIES`."""
+        return self.get_ident(request)
@@ -0,0 +1,86 @@
+"""Users app JSON web tokens."""
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from onboarding.users.instrumentation import TimedSerializerMixin
+from onboarding.users.models import MyUser
+from onboarding.users.revocation import is_revoked
+
+USER_CLAIMS = ("identifier", "identifier_type", "is_active", "is_staff")
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token embedding the user claims used by stateless auth.
+
+    Access tokens derived from it, including on refresh, carry the same
+    claims, so they reflect the user as it was at login.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        """Issue a token for the user, with its claims."""
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    def verify(self):
+        """Also reject revoked tokens, checked without a query."""
+        super().verify()
+        if is_revoked(self.payload):
+            raise TokenError(_("Token is revoked"))
+
+
+class ClaimsTokenObtainPairSerializer(
+    TimedSerializerMixin, TokenObtainPairSerializer
+):
+    """Login serializer issuing tokens with user claims."""
+
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(
+    TimedSerializerMixin, TokenRefreshSerializer
+):
+    """Refresh serializer rejecting revoked refresh tokens."""
+
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsUser(TokenUser):
+    """Request user built from token claims.
+
+    Behaves like the user for the embedded claims and only loads the
+    database row, through `instance`, when a view needs anything else.
+    """
+
+    @property
+    def identifier(self) -> str:
+        """Identifier claim."""
+        return self.token["identifier"]
+
+    @property
+    def identifier_type(self) -> str:
+        """Identifier type claim."""
+        return self.token["identifier_type"]
+
+    @property
+    def is_active(self) -> bool:
+        """Active status claim."""
+        return self.token["is_active"]
+
+    @cached_property
+    def instance(self):
+        """The user's database row."""
+        return MyUser.objects.get(pk=self.pk)
+
+    def __str__(self) -> str:
+        """Human readable representation of a user."""
+        return self.identifier
@@ -2,6 +2,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from onboarding.users import async_views
 from onboarding.users.views import (
     CustomTokenObtainPairView,
     CustomTokenRefreshPairView,
@@ -24,5 +25,16 @@ urlpatterns = [
         CustomTokenRefreshPairView.as_view(),
         name="token_refresh",
     ),
+    path(
+        "api/async/users/register/",
+        async_views.register,
+        name="async-user-register",
+    ),
+    path("api/async/users/otp/", async_views.otp, name="async-user-otp"),
+    path(
+        "api/async/users/verify_otp/",
+        async_views.verify_otp,
+        name="async-user-verify-otp",
+    ),
     path("api/", include(router.urls)),
 ]
@@ -1,23 +1,84 @@
 """User onboarding views."""
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db.utils import IntegrityError
+from django.http import StreamingHttpResponse
 from rest_framework import status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
-from onboarding.users.models import MyUser, OneTimePin, verify_OTP
+from onboarding.users.authentication import (
+    CachedTokenAuthentication,
+    ClaimsJWTAuthentication,
+)
+from onboarding.users.bloom import identifier_taken
+from onboarding.users.delivery import issue_OTP
+from onboarding.users.exports import EXPORTERS, export_rows
+from onboarding.users.metrics import REGISTRATIONS
+from onboarding.users.models import MyUser
+from onboarding.users.pagination import UserCursorPagination
+from onboarding.users.revocation import revoke_token, revoke_user_tokens
 from onboarding.users.serializers import (
+    BatchRegistrationSerializer,
+    IdentifierAvailabilitySerializer,
+    LogoutSerializer,
+    MyUserListSerializer,
     MyUserSerializer,
     OneTimePinSerializer,
     OneTimePinVerificationSerializer,
+    UserExportFilterSerializer,
     UserRegistrationSerializer,
 )
+from onboarding.users.stores import get_otp_store
+from onboarding.users.throttling import IdentifierRateThrottle, IPRateThrottle
+from onboarding.users.tokens import (
+    ClaimsRefreshToken,
+    ClaimsTokenObtainPairSerializer,
+    ClaimsTokenRefreshSerializer,
+)
+
+
+def user_tokens(user: MyUser) -> dict:
+    """Issue a JWT pair for a freshly registered user."""
+    refresh = ClaimsRefreshToken.for_user(user)
+    return {
+        "user": f"{user}",
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+    }
+
+
+def registration_error(error: Exception) -> dict:
+    """Describe why a registration was rejected."""
+    if isinstance(error, ValidationError):
+        return {"identifier": error.messages}
+    return {"user": "user with the same identifier exists"}
+
+
+def registration_result(error: Exception) -> str:
+    """Label a rejected registration for the registration counter."""
+    if isinstance(error, ValidationError):
+        return "invalid"
+    return "duplicate"
+
+
+OTP_THROTTLES = (IdentifierRateThrottle, IPRateThrottle)
+
+
+def OTP_cooldown_headers() -> dict:
+    """Tell clients refused during the resend cooldown when to retry.
+
+    The whole cooldown is an upper bound of what is left of it, which
+    the stores do not track.
+    """
+    return {"Retry-After": "%d" % settings.OTP_RESEND_COOLDOWN_SECONDS}
 
 
 class MyUserViewSet(viewsets.ModelViewSet):
@@ -25,8 +86,30 @@ class MyUserViewSet(viewsets.ModelViewSet):
 
     queryset = MyUser.objects.all()
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        ClaimsJWTAuthentication,
+    )
     serializer_class = MyUserSerializer
+    pagination_class = UserCursorPagination
+
+    def get_serializer_class(self):
+        """Never expose password hashes when reading users."""
+        if self.action == "retrieve":
+            return MyUserListSerializer
+        return super().get_serializer_class()
+
+    def list(self, request):
+        """List users a page at a time, straight from `.values()` rows."""
+        fields = MyUserListSerializer.select(
+            request.query_params.get("fields")
+        )
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            "id", "date_joined", *fields
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = MyUserListSerializer(page, many=True, fields=fields)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=["post"])
     def register(self, request):
@@ -36,52 +119,170 @@ class MyUserViewSet(viewsets.ModelViewSet):
         validated_data = serializer.validated_data
 
         if validated_data["password"] != validated_data["confirm_password"]:
+            REGISTRATIONS.labels(result="invalid").inc()
             return Response(
                 {"confirm_password": "passwords do not match"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         try:
-            user = MyUser.objects.create(
-                identifier=validated_data["identifier"],
-                identifier_type=validated_data["identifier_type"],
+            user = MyUser.objects.register_user(
+                validated_data["identifier"],
+                validated_data["identifier_type"],
+                validated_data["password"],
             )
-            user.set_password(validated_data["password"])
-            user.save()
-        except IntegrityError:
+        except (ValidationError, IntegrityError) as e:
+            REGISTRATIONS.labels(result=registration_result(e)).inc()
             return Response(
-                {"user": "user with the same identifier exists"},
+                registration_error(e),
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        refresh = RefreshToken.for_user(user)
+        REGISTRATIONS.labels(result="created").inc()
+        return Response(user_tokens(user))
+
+    def validate_registration(self, data) -> tuple:
+        """Validate one batch registration into a user and its password.
+
+        Returns the `(user, password)` pair and None, or None and the
+        validation errors.
+        """
+        serializer = UserRegistrationSerializer(data=data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+
+        validated_data = serializer.validated_data
+        if validated_data["password"] != validated_data["confirm_password"]:
+            return None, {"confirm_password": "passwords do not match"}
+        return self.build_registration(validated_data)
+
+    def build_registration(self, validated_data) -> tuple:
+        """Build the unsaved user of a valid registration."""
+        try:
+            user = MyUser.objects.build_user(
+                validated_data["identifier"],
+                validated_data["identifier_type"],
+            )
+        except ValidationError as e:
+            return None, {"identifier": e.messages}
+        return (user, validated_data["password"]), None
+
+    def validate_batch(self, batch: list) -> tuple:
+        """Validate a batch, marking every item invalid until proven not."""
+        results, users, passwords = [], [], []
+        for data in batch:
+            registration, errors = self.validate_registration(data)
+            results.append({"status": "invalid", "errors": errors})
+            if registration:
+                user, password = registration
+                user.batch_index = len(results) - 1
+                users.append(user)
+                passwords.append(password)
+        return results, users, passwords
+
+    @action(detail=False, methods=["post"])
+    def register_batch(self, request):
+        """Register many users at once, with a result per registration."""
+        serializer = BatchRegistrationSerializer(data={"users": request.data})
+        serializer.is_valid(raise_exception=True)
+
+        results, users, passwords = self.validate_batch(
+            serializer.validated_data["users"]
+        )
+        created, duplicates = MyUser.objects.bulk_register(users, passwords)
+        for user in created:
+            results[user.batch_index] = {
+                "status": "created",
+                **user_tokens(user),
+            }
+        for user in duplicates:
+            results[user.batch_index] = {
+                "status": "duplicate",
+                "user": f"{user}",
+            }
+        for result in results:
+            REGISTRATIONS.labels(result=result["status"]).inc()
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"], throttle_classes=(IPRateThrottle,))
+    def available(self, request):
+        """Tell whether an identifier can still be registered."""
+        serializer = IdentifierAvailabilitySerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
+        identifier = serializer.validated_data["identifier"]
         return Response(
             {
-                "user": f"{user}",
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
+                "identifier": identifier,
+                "available": not identifier_taken(identifier),
             }
         )
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream the filtered users as NDJSON or CSV."""
+        serializer = UserExportFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        options = dict(serializer.validated_data)
+        output = options.pop("output")
+
+        render, content_type = EXPORTERS[output]
+        response = StreamingHttpResponse(
+            render(export_rows(**options)), content_type=content_type
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="users.{output}"'
+        return response
+
     @action(detail=False, methods=["post"])
+    def logout(self, request):
+        """Revoke a refresh token."""
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            refresh = ClaimsRefreshToken(serializer.validated_data["refresh"])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        revoke_token(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def revoke_tokens(self, request, pk=None):
+        """Revoke every token of a user, for themselves or staff."""
+        if str(request.user.pk) != pk and not request.user.is_staff:
+            raise PermissionDenied()
+
+        user = self.get_object()
+        revoke_user_tokens(user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], throttle_classes=OTP_THROTTLES)
     def otp(self, request):
         """Send OTP to user for onboarding verification."""
         serializer = OneTimePinSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         validated_data = serializer.validated_data
-        OTP = OneTimePin.objects.create(
-            identifier=validated_data["identifier"],
-            identifier_type=validated_data["identifier_type"],
+        code = issue_OTP(
+            validated_data["identifier"],
+            validated_data["identifier_type"],
         )
-        OTP.save()
+        if code is None:
+            return Response(
+                {"one_time_PIN": "wait before requesting another one"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers=OTP_cooldown_headers(),
+            )
         return Response({"one_time_PIN": "sent successfully"})
 
-    @action(detail=False, methods=["post"])
+    @action(detail=False, methods=["post"], throttle_classes=OTP_THROTTLES)
     def verify_otp(self, request):
         """Verify OTP for user onboarding."""
         serializer = OneTimePinVerificationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         validated_data = serializer.validated_data
-        verified = verify_OTP(
+        verified = get_otp_store().verify(
             validated_data["code"],
             validated_data["identifier"],
             validated_data["identifier_type"],
@@ -92,15 +293,23 @@ class MyUserViewSet(viewsets.ModelViewSet):
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Customized token generation view."""
 
+    serializer_class = ClaimsTokenObtainPairSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        ClaimsJWTAuthentication,
+    )
 
 
 class CustomTokenRefreshPairView(TokenRefreshView):
     """Customized token refresh view."""
 
+    serializer_class = ClaimsTokenRefreshSerializer
     permission_classes = (IsAuthenticated,)
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (
+        CachedTokenAuthentication,
+        ClaimsJWTAuthentication,
+    )
 
 
 class OneTimePinViewSet(viewsets.ModelViewSet):
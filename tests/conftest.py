@@ -0,0 +1,44 @@
+"""Shared test fixtures."""
+import pytest
+from django.core.cache import caches
+from model_bakery import baker
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from onboarding.users.models import MyUser
+from onboarding.users.revocation import reset_denylist
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty caches."""
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_token_denylist():
+    """Start every test with an empty token denylist."""
+    reset_denylist()
+
+
+@pytest.fixture
+def user():
+    """Test user."""
+    return baker.make(
+        MyUser, identifier="+254710234567", identifier_type="PHONE_NUMBER"
+    )
+
+
+@pytest.fixture
+def token(user):
+    """Test user's token."""
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def client(token):
+    """Authenticate an API client with the test user's token."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+    return client
@@ -0,0 +1,143 @@
+"""Async onboarding views test cases."""
+import asyncio
+
+import pytest
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from onboarding.users.models import MyUser, OneTimePin, OutboxMessage
+from onboarding.users.revocation import revoke_user_tokens
+from onboarding.users.tokens import ClaimsRefreshToken
+
+
+@pytest.mark.django_db
+def test_async_register(client):
+    """Verify users are registered by the async view."""
+    url = reverse("async-user-register")
+    payload = {
+        "identifier": "MyUser@EMAIL.com",
+        "identifier_type": "EMAIL",
+        "password": "secret",
+        "confirm_password": "secret",
+    }
+
+    response = client.post(url, payload, format="json")
+    assert response.status_code == 200
+    assert response.json()["user"] == "MyUser@email.com"
+    assert MyUser.objects.get(identifier="MyUser@email.com").check_password(
+        "secret"
+    )
+
+    response = client.post(url, payload, format="json")
+    assert response.status_code == 400
+    assert response.json() == {"user": "user with the same identifier exists"}
+
+    response = client.post(
+        url, {**payload, "confirm_password": "other"}, format="json"
+    )
+    assert response.status_code == 400
+    assert "confirm_password" in response.json()
+
+
+@pytest.mark.django_db
+def test_async_register_rejects_invalid_requests(client):
+    """Verify validation, parse, method and authentication errors."""
+    url = reverse("async-user-register")
+
+    response = client.post(url, {"identifier": "x"}, format="json")
+    assert response.status_code == 400
+    assert "identifier_type" in response.json()
+
+    response = client.post(url, "{", content_type="application/json")
+    assert response.status_code == 400
+    assert "JSON parse error" in response.json()["detail"]
+
+    assert client.get(url).status_code == 405
+
+    response = APIClient().post(url, {}, format="json")
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"] == "Token"
+
+
+@pytest.mark.django_db
+def test_async_otp_flow(client):
+    """Verify an OTP is issued, queued and verified asynchronously."""
+    payload = {
+        "identifier": "+254710234568",
+        "identifier_type": "PHONE_NUMBER",
+    }
+
+    response = client.post(reverse("async-user-otp"), payload, format="json")
+    assert response.status_code == 200
+    assert OutboxMessage.objects.filter(identifier="+254710234568").exists()
+
+    response = client.post(reverse("async-user-otp"), payload, format="json")
+    assert response.status_code == 429
+    assert response["Retry-After"] == "30"
+
+    code = OneTimePin.objects.get(identifier="+254710234568").code
+    url = reverse("async-user-verify-otp")
+    response = client.post(url, {**payload, "code": code}, format="json")
+    assert response.json() == {"verification": True}
+    response = client.post(url, {**payload, "code": code}, format="json")
+    assert response.json() == {"verification": False}
+
+
+@pytest.mark.django_db
+def test_async_verify_otp_with_cache_store(client, settings):
+    """Verify codes are consumed through the cache's async API."""
+    settings.OTP_STORE = "onboarding.users.stores.CacheOTPStore"
+    payload = {"identifier": "myuser@email.com", "identifier_type": "EMAIL"}
+    client.post(reverse("async-user-otp"), payload, format="json")
+    code = OutboxMessage.objects.get().code
+    url = reverse("async-user-verify-otp")
+
+    response = client.post(url, {**payload, "code": code}, format="json")
+    assert response.json() == {"verification": True}
+    response = client.post(url, {**payload, "code": code}, format="json")
+    assert response.json() == {"verification": False}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_async_requests(token):
+    """Verify many requests can be in flight on one event loop."""
+    client = AsyncClient()
+    headers = {"Authorization": "Token " + token.key}
+    url = reverse("async-user-otp")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(
+                client.post(
+                    url,
+                    {
+                        "identifier": f"user{i}@email.com",
+                        "identifier_type": "EMAIL",
+                    },
+                    content_type="application/json",
+                    headers=headers,
+                )
+                for i in range(20)
+            )
+        )
+
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200] * 20
+    assert OutboxMessage.objects.count() == 20
+
+
+@pytest.mark.django_db
+def test_async_bearer_authentication(user, settings):
+    """Verify Bearer tokens authenticate, loading the denylist first."""
+    settings.JWT_CLAIMS_AUTHENTICATION = True
+    token = ClaimsRefreshToken.for_user(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    url = reverse("async-user-otp")
+    payload = {"identifier": "myuser@email.com", "identifier_type": "EMAIL"}
+
+    assert client.post(url, payload, format="json").status_code == 200
+
+    revoke_user_tokens(user.pk)
+    assert client.post(url, payload, format="json").status_code == 401
@@ -0,0 +1,161 @@
+"""Users app authentication test cases."""
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from onboarding.users.tokens import ClaimsRefreshToken, ClaimsUser
+
+pytestmark = pytest.mark.django_db
+
+
+def verify_invalid_otp(client):
+    """Hit an authenticated endpoint that does a single query itself."""
+    return client.post(
+        reverse("user-verify-otp"),
+        {
+            "identifier": "+254700999888",
+            "identifier_type": "PHONE_NUMBER",
+            "code": "12345",
+        },
+        format="json",
+    )
+
+
+def test_token_lookups_are_cached(client, django_assert_num_queries):
+    """Verify only the first request looks the token up."""
+    with django_assert_num_queries(2):
+        assert verify_invalid_otp(client).status_code == 200
+
+    with django_assert_num_queries(1):
+        assert verify_invalid_otp(client).status_code == 200
+
+
+def test_deleted_token_is_forgotten(client, token):
+    """Verify a deleted token stops authenticating immediately."""
+    assert verify_invalid_otp(client).status_code == 200
+
+    token.delete()
+    assert verify_invalid_otp(client).status_code == 401
+
+
+def test_deactivated_user_is_forgotten(client, user):
+    """Verify a deactivated user stops authenticating immediately."""
+    assert verify_invalid_otp(client).status_code == 200
+
+    user.is_active = False
+    user.save()
+    assert verify_invalid_otp(client).status_code == 401
+
+
+def test_invalid_token(client):
+    """Verify unknown tokens are rejected."""
+    client.credentials(HTTP_AUTHORIZATION="Token unknown")
+    assert verify_invalid_otp(client).status_code == 401
+
+
+@pytest.fixture
+def access_token(user):
+    """Access token with the test user's claims."""
+    return str(ClaimsRefreshToken.for_user(user).access_token)
+
+
+@pytest.fixture
+def bearer_client(access_token, settings):
+    """Client authenticated with a claims carrying access token."""
+    settings.JWT_CLAIMS_AUTHENTICATION = True
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Bearer " + access_token)
+    return client
+
+
+def test_claims_authentication(bearer_client, django_assert_num_queries):
+    """Verify access tokens authenticate without loading the user."""
+    # The first request also loads the token denylist.
+    verify_invalid_otp(bearer_client)
+    with django_assert_num_queries(1):
+        assert verify_invalid_otp(bearer_client).status_code == 200
+
+
+def test_claims_authentication_is_optional(bearer_client, settings):
+    """Verify Bearer tokens are ignored unless the mode is enabled."""
+    settings.JWT_CLAIMS_AUTHENTICATION = False
+    assert verify_invalid_otp(bearer_client).status_code == 401
+
+
+def test_claims_authentication_rejects_inactive_users(settings, user):
+    """Verify tokens issued to inactive users are rejected."""
+    settings.JWT_CLAIMS_AUTHENTICATION = True
+    user.is_active = False
+    token = ClaimsRefreshToken.for_user(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    assert verify_invalid_otp(client).status_code == 401
+
+
+def test_claims_authentication_requires_claims(settings, user):
+    """Verify tokens without user claims are rejected."""
+    settings.JWT_CLAIMS_AUTHENTICATION = True
+    token = RefreshToken.for_user(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    assert verify_invalid_otp(client).status_code == 401
+
+
+def test_claims_user(user, access_token, django_assert_num_queries):
+    """Verify the claims user only loads its row on demand."""
+    with django_assert_num_queries(0):
+        claims_user = ClaimsUser(AccessToken(access_token))
+        assert str(claims_user) == "+254710234567"
+        assert claims_user.identifier_type == "PHONE_NUMBER"
+        assert claims_user.is_active
+        assert not claims_user.is_staff
+        assert claims_user.pk == user.pk
+
+    with django_assert_num_queries(1):
+        assert claims_user.instance == user
+        assert claims_user.instance.date_joined == user.date_joined
+
+
+def test_login_issues_claims(client, user):
+    """Verify logging in issues tokens carrying the user claims."""
+    user.set_password("admin")
+    user.save()
+    response = client.post(
+        reverse("token_obtain_pair"),
+        {"identifier": "+254710234567", "password": "admin"},
+        format="json",
+    )
+
+    access = AccessToken(response.json()["access"])
+    assert access["identifier"] == "+254710234567"
+    assert access["is_active"]
+
+
+@pytest.mark.parametrize(
+    "identifier,identifier_type",
+    [("+254 710 234 568", "PHONE_NUMBER"), ("Bob@EXAMPLE.com", "EMAIL")],
+)
+def test_login_with_identifier_as_registered(
+    client, identifier, identifier_type
+):
+    """Verify users log in with the identifier spelled as they registered."""
+    client.post(
+        reverse("user-register"),
+        {
+            "identifier": identifier,
+            "identifier_type": identifier_type,
+            "password": "secret",
+            "confirm_password": "secret",
+        },
+        format="json",
+    )
+
+    response = client.post(
+        reverse("token_obtain_pair"),
+        {"identifier": identifier, "password": "secret"},
+        format="json",
+    )
+    assert response.status_code == 200
@@ -0,0 +1,94 @@
+"""Identifier availability filter test cases."""
+import pytest
+from django.urls import reverse
+
+from onboarding.users import bloom
+from onboarding.users.bloom import BloomFilter
+from onboarding.users.models import MyUser
+
+
+def test_bloom_filter():
+    """Verify added values are found and the error rate holds."""
+    values = BloomFilter(1000, 0.01)
+    values.update(f"user{i}@email.com" for i in range(1000))
+
+    assert all(f"user{i}@email.com" in values for i in range(1000))
+    false_positives = sum(
+        f"other{i}@email.com" in values for i in range(10000)
+    )
+    assert false_positives < 300
+
+
+@pytest.fixture(autouse=True)
+def small_filter(settings):
+    """Build small identifier filters."""
+    settings.IDENTIFIER_FILTER_MIN_CAPACITY = 1000
+
+
+@pytest.mark.django_db
+def test_available(client, django_assert_num_queries):
+    """Verify negative answers cost no query once the filter is built."""
+    url = reverse("user-available")
+
+    response = client.get(url, {"identifier": "+254 710 234 567"})
+    assert response.json() == {
+        "identifier": "+254710234567",
+        "available": False,
+    }
+
+    with django_assert_num_queries(0):
+        response = client.get(url, {"identifier": "MyUser@EMAIL.com"})
+    assert response.json() == {
+        "identifier": "MyUser@email.com",
+        "available": True,
+    }
+
+    response = client.get(url, {"identifier": "12345"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_registrations_are_remembered(client):
+    """Verify single and bulk registrations update the filter."""
+    url = reverse("user-available")
+    client.get(url, {"identifier": "+254710234567"})
+
+    MyUser.objects.register_user("one@email.com", "EMAIL", "secret")
+    MyUser.objects.bulk_register(
+        [MyUser.objects.build_user("two@email.com", "EMAIL")], ["secret"]
+    )
+
+    for identifier in ("one@email.com", "two@email.com"):
+        response = client.get(url, {"identifier": identifier})
+        assert response.json()["available"] is False
+
+
+@pytest.mark.django_db
+def test_filter_is_rebuilt(user, settings):
+    """Verify the filter is rebuilt once it gets old."""
+    first = bloom._identifier_filter.get()
+    assert bloom._identifier_filter.get() is first
+
+    bloom._identifier_filter.built_at -= (
+        settings.IDENTIFIER_FILTER_REBUILD_SECONDS + 1
+    )
+    assert bloom._identifier_filter.get() is not first
+    assert "+254710234567" in bloom._identifier_filter.get()
+
+
+@pytest.mark.django_db
+def test_only_new_identifiers_are_remembered(client, user):
+    """Verify saves that keep the identifier do not fill the filter."""
+    client.get(reverse("user-available"), {"identifier": "one@email.com"})
+    count = bloom._identifier_filter.get().count
+
+    user = MyUser.objects.get(pk=user.pk)
+    user.is_staff = True
+    user.save()
+    user.save(update_fields=["is_staff"])
+    assert bloom._identifier_filter.get().count == count
+
+    user.identifier = "+254710234568"
+    user.save()
+    assert bloom._identifier_filter.get().count == count + 1
+    assert "+254710234568" in bloom._identifier_filter.get()
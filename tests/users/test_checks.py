@@ -0,0 +1,38 @@
+"""System check test cases."""
+from onboarding.users.checks import check_OTP_providers, check_shared_caches
+
+
+def test_per_process_cache_warns():
+    """Verify every alias on the default LocMemCache is reported."""
+    warnings = check_shared_caches(None)
+
+    assert [warning.id for warning in warnings] == ["users.W001"] * 3
+    assert "AUTH_TOKEN_CACHE_ALIAS" in warnings[0].msg
+
+
+def test_shared_cache_passes(settings):
+    """Verify a shared cache backend raises no warning."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379/0",
+        }
+    }
+
+    assert check_shared_caches(None) == []
+
+
+def test_logging_provider_needs_debug(settings):
+    """Verify only logging OTPs is an error unless DEBUG is on."""
+    settings.DEBUG = False
+    settings.OTP_PROVIDERS = {
+        "EMAIL": {"BACKEND": "onboarding.users.providers.LoggingProvider"},
+        "PHONE_NUMBER": {"BACKEND": "onboarding.users.providers.SMSProvider"},
+    }
+
+    (error,) = check_OTP_providers(None)
+    assert error.id == "users.E001"
+    assert "EMAIL" in error.msg
+
+    settings.DEBUG = True
+    assert check_OTP_providers(None) == []
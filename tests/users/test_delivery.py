@@ -0,0 +1,148 @@
+"""OTP delivery test cases."""
+import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.utils import timezone
+from model_bakery import baker
+
+from onboarding.users.delivery import OutboxDispatcher, issue_OTP
+from onboarding.users.models import OneTimePin, OutboxMessage
+from onboarding.users.providers import LocalMemoryProvider, get_provider
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def local_memory_providers(settings):
+    """Deliver OTPs to memory."""
+    settings.OTP_PROVIDERS = {
+        "EMAIL": {"BACKEND": "onboarding.users.providers.LocalMemoryProvider"},
+        "PHONE_NUMBER": {
+            "BACKEND": "onboarding.users.providers.LocalMemoryProvider"
+        },
+    }
+    LocalMemoryProvider.outbox = []
+    yield
+    LocalMemoryProvider.outbox = []
+
+
+def test_issue_otp_queues_delivery():
+    """Verify issuing an OTP queues its delivery."""
+    code = issue_OTP("+254700999888", "PHONE_NUMBER")
+
+    message = OutboxMessage.objects.get()
+    assert message.code == code
+    assert message.identifier == "+254700999888"
+    assert message.status == OutboxMessage.PENDING
+    assert str(message) == "+254700999888 (PENDING)"
+
+
+def test_issue_otp_during_cooldown_queues_nothing():
+    """Verify no delivery is queued when no OTP was issued."""
+    issue_OTP("+254700999888", "PHONE_NUMBER")
+
+    assert issue_OTP("+254700999888", "PHONE_NUMBER") is None
+    assert OutboxMessage.objects.count() == 1
+
+
+def test_issue_otp_is_transactional(monkeypatch):
+    """Verify the OTP is rolled back when queueing its delivery fails."""
+
+    def fail(*args, **kwargs):
+        raise DatabaseError("outbox unavailable")
+
+    monkeypatch.setattr(OutboxMessage.objects, "create", fail)
+    with pytest.raises(DatabaseError):
+        issue_OTP("+254700999888", "PHONE_NUMBER")
+
+    assert not OneTimePin.objects.exists()
+
+
+def test_dispatcher_delivers_batches():
+    """Verify pending messages are delivered in batches."""
+    issue_OTP("+254700999888", "PHONE_NUMBER")
+    issue_OTP("myuser@email.com", "EMAIL")
+
+    outcome = OutboxDispatcher(batch_size=10).run_once()
+
+    assert outcome == {"sent": 2}
+    assert sorted(
+        recipient for recipient, _ in LocalMemoryProvider.outbox
+    ) == [
+        "+254700999888",
+        "myuser@email.com",
+    ]
+    assert not OutboxMessage.objects.exclude(status=OutboxMessage.SENT)
+    assert OutboxDispatcher().run_once() == {}
+
+
+def test_dispatcher_retries_with_backoff(monkeypatch):
+    """Verify failed sends are retried later and eventually given up."""
+    message = baker.make(
+        OutboxMessage, identifier_type="PHONE_NUMBER", code="123456"
+    )
+
+    def fail(messages):
+        raise ConnectionError("provider down")
+
+    monkeypatch.setattr(get_provider("PHONE_NUMBER"), "send_batch", fail)
+    dispatcher = OutboxDispatcher(max_attempts=2, backoff=10)
+
+    assert dispatcher.run_once() == {"retried": 1}
+    message.refresh_from_db()
+    assert message.attempts == 1
+    assert message.status == OutboxMessage.PENDING
+    assert "provider down" in message.last_error
+    assert message.next_attempt_at > timezone.now()
+    assert dispatcher.run_once() == {}
+
+    OutboxMessage.objects.update(next_attempt_at=timezone.now())
+    assert dispatcher.run_once() == {"failed": 1}
+    message.refresh_from_db()
+    assert message.status == OutboxMessage.FAILED
+
+
+def test_dispatcher_expires_stale_messages(settings):
+    """Verify codes past their validity window are not sent anymore."""
+    settings.OTP_VALIDITY_SECONDS = 10
+    stale = baker.make(
+        OutboxMessage, identifier_type="PHONE_NUMBER", code="123456"
+    )
+    OutboxMessage.objects.filter(pk=stale.pk).update(
+        created=timezone.now() - datetime.timedelta(seconds=11)
+    )
+    issue_OTP("myuser@email.com", "EMAIL")
+
+    assert OutboxDispatcher().run_once() == {"sent": 1, "expired": 1}
+    assert [recipient for recipient, _ in LocalMemoryProvider.outbox] == [
+        "myuser@email.com"
+    ]
+    stale.refresh_from_db()
+    assert stale.status == OutboxMessage.FAILED
+    assert stale.last_error == "Code expired"
+
+
+def test_send_otp():
+    """Verify a pin can be sent directly through its provider."""
+    otp = baker.make(
+        OneTimePin, identifier="myuser@email.com", identifier_type="EMAIL"
+    )
+
+    assert otp.send_OTP()
+    assert LocalMemoryProvider.outbox == [
+        ("myuser@email.com", f"Your one time PIN is {otp.code}")
+    ]
+
+
+def test_dispatch_otps_command():
+    """Verify the dispatcher command drains the outbox."""
+    issue_OTP("+254700999888", "PHONE_NUMBER")
+    out = StringIO()
+
+    call_command("dispatch_otps", "--once", stdout=out)
+
+    assert "Sent 1, retried 0, failed 0" in out.getvalue()
+    assert OutboxMessage.objects.get().status == OutboxMessage.SENT
@@ -0,0 +1,54 @@
+"""User export command test cases."""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from onboarding.users.models import MyUser
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    """Users to export."""
+    baker.make(
+        MyUser, identifier="+254700999888", identifier_type="PHONE_NUMBER"
+    )
+    baker.make(MyUser, identifier="myuser@email.com", identifier_type="EMAIL")
+
+
+def test_export_ndjson_to_stdout(users):
+    """Verify users are written to the standard output in chunks."""
+    out = StringIO()
+    call_command("export_users", "--chunk-size=1", stdout=out)
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["identifier"] for row in rows] == [
+        "+254700999888",
+        "myuser@email.com",
+    ]
+
+
+def test_export_csv_to_file(users, tmp_path):
+    """Verify filtered users are written to a CSV file."""
+    path = tmp_path / "users.csv"
+    call_command(
+        "export_users",
+        "--format=csv",
+        "--identifier-type=EMAIL",
+        "--is-active=true",
+        f"--output-file={path}",
+    )
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert ",myuser@email.com,EMAIL,True,False," in lines[1]
+
+
+def test_export_invalid_filters(users):
+    """Verify invalid filters are reported."""
+    with pytest.raises(CommandError, match="identifier_type"):
+        call_command("export_users", "--identifier-type=FAX")
@@ -0,0 +1,73 @@
+"""OTP code generator test cases."""
+from collections import Counter
+
+import pytest
+
+from onboarding.users.generators import CodeGenerator, get_code_generator
+from onboarding.users.models import OneTimePin
+
+
+def test_generate_many():
+    """Verify bulk generation honours the code shape."""
+    generator = CodeGenerator(length=8, alphabet="ABC")
+    codes = generator.generate_many(50)
+
+    assert len(codes) == 50
+    assert all(len(code) == 8 for code in codes)
+    assert set("".join(codes)) <= set("ABC")
+
+
+def test_symbols_are_uniform():
+    """Verify rejection sampling does not bias any symbol."""
+    generator = CodeGenerator(length=1, alphabet="0123456789")
+    counts = Counter(generator.generate_many(20000))
+
+    assert set(counts) == set("0123456789")
+    assert all(1700 < count < 2300 for count in counts.values())
+
+
+def test_generate_refills_buffer():
+    """Verify single codes come from a buffer that is refilled."""
+    generator = CodeGenerator(batch_size=2)
+    codes = [generator.generate() for _ in range(5)]
+
+    assert all(len(code) == 6 and code.isdigit() for code in codes)
+    assert len(generator._codes) == 1
+
+
+def test_generate_drops_buffer_after_fork():
+    """Verify a forked process does not reuse buffered codes."""
+    generator = CodeGenerator(batch_size=10)
+    generator.generate()
+    generator._pid = -1
+
+    generator.generate()
+    assert len(generator._codes) == 9
+
+
+def test_invalid_alphabet():
+    """Verify alphabets need at least two symbols."""
+    with pytest.raises(ValueError):
+        CodeGenerator(alphabet="0")
+
+
+def test_configured_generator(settings):
+    """Verify the shared generator follows the settings."""
+    settings.OTP_CODE_LENGTH = 4
+    settings.OTP_CODE_ALPHABET = "XY"
+    code = get_code_generator().generate()
+
+    assert len(code) == 4
+    assert set(code) <= {"X", "Y"}
+    assert get_code_generator() is get_code_generator()
+
+
+@pytest.mark.django_db
+def test_one_time_pin_save_is_a_single_query(django_assert_num_queries):
+    """Verify saving a pin does not look for colliding codes."""
+    with django_assert_num_queries(1):
+        otp = OneTimePin.objects.create(
+            identifier="myuser@email.com", identifier_type="EMAIL"
+        )
+
+    assert len(otp.code) == 6
@@ -0,0 +1,114 @@
+"""Password hashing test cases."""
+import asyncio
+
+import pytest
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, make_password
+from model_bakery import baker
+
+from onboarding.users import hashing
+from onboarding.users.models import MyUser
+
+
+@pytest.fixture
+def hashing_pool(settings):
+    """Hash passwords on a two process pool."""
+    settings.PASSWORD_HASHING_WORKERS = 2
+    yield
+    settings.PASSWORD_HASHING_WORKERS = 0
+
+
+def test_inline_hashing():
+    """Verify passwords are hashed inline without workers."""
+    encoded = hashing.hash_password("admin")
+
+    assert hashing.get_executor() is None
+    assert check_password("admin", encoded)
+    assert hashing.check_password("admin", encoded)
+    assert not hashing.check_password("not-admin", encoded)
+
+
+def test_pooled_hashing(hashing_pool):
+    """Verify passwords are hashed and checked on the pool."""
+    encoded = hashing.hash_password("admin")
+
+    assert hashing.get_executor() is hashing.get_executor()
+    assert check_password("admin", encoded)
+    assert hashing.check_password("admin", encoded)
+    assert not hashing.check_password("not-admin", encoded)
+
+
+def test_hash_passwords(hashing_pool):
+    """Verify passwords can be hashed in bulk."""
+    encoded = hashing.hash_passwords(["one", "two", None])
+
+    assert check_password("one", encoded[0])
+    assert check_password("two", encoded[1])
+    assert encoded[2].startswith("!")
+
+
+def test_outdated_hash_is_upgraded():
+    """Verify the setter is called for hashes made with old parameters."""
+    encoded = make_password("admin", hasher="pbkdf2_sha1")
+    upgraded = []
+
+    assert hashing.check_password("admin", encoded, upgraded.append)
+    assert upgraded == ["admin"]
+
+
+def test_async_hashing(hashing_pool):
+    """Verify the awaitable variants."""
+
+    async def scenario():
+        encoded = await hashing.ahash_password("admin")
+        return await hashing.acheck_password("admin", encoded)
+
+    assert asyncio.run(scenario())
+
+
+@pytest.mark.django_db
+def test_login_checks_password_on_pool(hashing_pool):
+    """Verify authentication goes through the hashing pool."""
+    user = baker.make(
+        MyUser, identifier="+254710234567", identifier_type="PHONE_NUMBER"
+    )
+    user.set_password("admin")
+    user.save()
+
+    assert authenticate(identifier="+254710234567", password="admin") == user
+    assert authenticate(identifier="+254710234567", password="nope") is None
+
+
+@pytest.mark.django_db
+def test_user_password_is_upgraded():
+    """Verify an outdated user hash is rewritten after a login."""
+    user = baker.make(
+        MyUser,
+        identifier="+254710234567",
+        identifier_type="PHONE_NUMBER",
+        password=make_password("admin", hasher="pbkdf2_sha1"),
+    )
+
+    assert user.check_password("admin")
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_async_password_methods():
+    """Verify the awaitable user password methods."""
+    user = baker.make(
+        MyUser,
+        identifier="+254710234567",
+        identifier_type="PHONE_NUMBER",
+        password=make_password("admin", hasher="pbkdf2_sha1"),
+    )
+
+    async def scenario():
+        assert await user.acheck_password("admin")
+        await user.aset_password("other")
+        return await user.acheck_password("other")
+
+    assert asyncio.run(scenario())
+    user.refresh_from_db()
+    assert user.password.startswith("pbkdf2_sha256$")
@@ -0,0 +1,109 @@
+"""Identifier normalization test cases."""
+import pytest
+from django.core.exceptions import ValidationError
+from model_bakery import baker
+
+from onboarding.users import identifiers, models
+from onboarding.users.identifiers import _normalize, normalize_identifier
+from onboarding.users.models import MyUser
+from onboarding.users.serializers import UserRegistrationSerializer
+
+
+def test_phone_numbers_are_formatted_as_e164():
+    """Verify phone numbers are canonicalized."""
+    assert (
+        normalize_identifier("+254 711-223 344", "PHONE_NUMBER")
+        == "+254711223344"
+    )
+
+
+@pytest.mark.parametrize("identifier", ["0711223344", "+2547", "myuser"])
+def test_invalid_phone_numbers(identifier):
+    """Verify only valid international numbers are accepted."""
+    with pytest.raises(ValidationError) as e:
+        normalize_identifier(identifier, "PHONE_NUMBER")
+    assert e.value.message == "The phone number entered is not valid."
+
+
+def test_email_domains_are_lowercased():
+    """Verify emails are canonicalized."""
+    assert (
+        normalize_identifier("MyUser@EMAIL.com", "EMAIL") == "MyUser@email.com"
+    )
+
+    with pytest.raises(ValidationError) as e:
+        normalize_identifier("myuser", "EMAIL")
+    assert e.value.message == "Enter a valid email address."
+
+
+def test_unknown_identifier_type():
+    """Verify identifiers need a known type."""
+    with pytest.raises(ValidationError) as e:
+        normalize_identifier("myuser", "FAX")
+    assert e.value.message == "Unknown identifier type FAX"
+
+
+def test_parse_results_are_cached():
+    """Verify repeated identifiers are only parsed once."""
+    normalize_identifier("+254711223366", "PHONE_NUMBER")
+    hits = _normalize.cache_info().hits
+
+    normalize_identifier("+254711223366", "PHONE_NUMBER")
+    with pytest.raises(ValidationError):
+        normalize_identifier("cache-miss-number", "PHONE_NUMBER")
+    with pytest.raises(ValidationError):
+        normalize_identifier("cache-miss-number", "PHONE_NUMBER")
+
+    assert _normalize.cache_info().hits == hits + 2
+
+
+@pytest.mark.django_db
+def test_unchanged_identifiers_are_not_revalidated(monkeypatch):
+    """Verify saving a loaded user does not parse its identifier again."""
+    baker.make(
+        MyUser, identifier="+254711223344", identifier_type="PHONE_NUMBER"
+    )
+    user = MyUser.objects.get()
+
+    def fail(*args):
+        raise AssertionError("identifier validated again")
+
+    monkeypatch.setattr(models, "normalize_identifier", fail)
+    user.is_staff = True
+    user.save()
+
+    user.identifier = "+254711223355"
+    with pytest.raises(AssertionError):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_users_are_stored_normalized():
+    """Verify models and the manager store canonical identifiers."""
+    user = baker.make(
+        MyUser, identifier="+254 711 223 344", identifier_type="PHONE_NUMBER"
+    )
+    assert user.identifier == "+254711223344"
+
+    user = MyUser.objects.create_user("MyUser@EMAIL.com", "EMAIL", "admin")
+    assert user.identifier == "MyUser@email.com"
+
+
+def test_serializers_normalize_identifiers():
+    """Verify serializers hand out canonical identifiers."""
+    serializer = UserRegistrationSerializer(
+        data={
+            "identifier": "+254 711 223 344",
+            "identifier_type": "PHONE_NUMBER",
+            "password": "admin",
+            "confirm_password": "admin",
+        }
+    )
+
+    assert serializer.is_valid()
+    assert serializer.validated_data["identifier"] == "+254711223344"
+
+
+def test_normalizers_are_registered_per_type():
+    """Verify every identifier type has a normalizer."""
+    assert set(identifiers.NORMALIZERS) == {"EMAIL", "PHONE_NUMBER"}
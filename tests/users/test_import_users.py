@@ -0,0 +1,93 @@
+"""User import command test cases."""
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from onboarding.users.models import MyUser
+
+pytestmark = pytest.mark.django_db
+
+
+def run_import(path, *args):
+    """Run the import command, returning its output and errors."""
+    out, err = StringIO(), StringIO()
+    call_command(
+        "import_users", str(path), "--workers=1", *args, stdout=out, stderr=err
+    )
+    return out.getvalue(), err.getvalue()
+
+
+def test_import_csv(tmp_path):
+    """Verify users are imported from a CSV file in chunks."""
+    baker.make(
+        MyUser, identifier="+254700999888", identifier_type="PHONE_NUMBER"
+    )
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "identifier,identifier_type,password\n"
+        "+254700999887,PHONE_NUMBER,secret\n"
+        "+254700999888,PHONE_NUMBER,secret\n"
+        "myuser@EMAIL.com,EMAIL,\n"
+        "not-an-email,EMAIL,secret\n"
+        "+254700999887,PHONE_NUMBER,secret\n"
+    )
+
+    out, err = run_import(path, "--chunk-size=2")
+
+    assert "5 rows: 2 created, 2 duplicate, 1 invalid" in out
+    assert "row 4: invalid identifier not-an-email" in err
+    assert "row 2: duplicate identifier +254700999888" in err
+    assert "row 5: duplicate identifier +254700999887" in err
+    assert MyUser.objects.count() == 3
+    assert MyUser.objects.get(identifier="+254700999887").check_password(
+        "secret"
+    )
+    assert not MyUser.objects.get(
+        identifier="myuser@email.com"
+    ).has_usable_password()
+
+
+def test_import_ndjson(tmp_path):
+    """Verify users are imported from a newline delimited JSON file."""
+    path = tmp_path / "users.ndjson"
+    rows = [
+        {"identifier": "myuser@email.com", "identifier_type": "EMAIL"},
+        {"identifier": "+254700999887", "identifier_type": "FAX"},
+    ]
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\n\n")
+
+    out, err = run_import(path)
+
+    assert "2 rows: 1 created, 0 duplicate, 1 invalid" in out
+    assert "Unknown identifier type FAX" in err
+    assert MyUser.objects.get().identifier == "myuser@email.com"
+
+
+def test_import_malformed_lines(tmp_path):
+    """Verify unreadable JSON lines are reported without stopping."""
+    path = tmp_path / "users.jsonl"
+    path.write_text(
+        '{"identifier": "myuser@email.com", "identifier_type": "EMAIL"}\n'
+        '{"identifier": "broken@email.com",\n'
+        '["+254700999887", "PHONE_NUMBER"]\n'
+        '{"identifier": "other@email.com", "identifier_type": "EMAIL"}\n'
+    )
+
+    out, err = run_import(path)
+
+    assert "4 rows: 2 created, 0 duplicate, 2 invalid" in out
+    assert "row 2: invalid identifier None (Malformed JSON" in err
+    assert "row 3: invalid identifier None (Not a JSON object)" in err
+    assert MyUser.objects.count() == 2
+
+
+def test_import_unknown_format(tmp_path):
+    """Verify files of unknown formats are refused."""
+    path = tmp_path / "users.json"
+    path.write_text("[]")
+
+    with pytest.raises(CommandError, match="Unknown file format 'json'"):
+        run_import(path)
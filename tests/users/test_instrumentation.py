@@ -0,0 +1,85 @@
+"""Request instrumentation test cases."""
+import asyncio
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+
+from onboarding.users.instrumentation import Timings, _timings, timed
+
+pytestmark = pytest.mark.django_db
+
+
+def register(client, url="user-register"):
+    """Register a user."""
+    payload = {
+        "identifier": "myuser@email.com",
+        "identifier_type": "EMAIL",
+        "password": "secret",
+        "confirm_password": "secret",
+    }
+    return client.post(reverse(url), payload, format="json")
+
+
+def server_timing(response) -> dict:
+    """Parse the Server-Timing header into durations by name."""
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, duration, *_ = metric.split(";")
+        metrics[name] = float(duration.removeprefix("dur="))
+    return metrics
+
+
+@pytest.mark.parametrize("url", ["user-register", "async-user-register"])
+def test_sampled_request(client, settings, caplog, url):
+    """Verify sampled requests report where their time went."""
+    settings.INSTRUMENTATION_SAMPLE_PERCENT = 100
+
+    with caplog.at_level(
+        logging.INFO, logger="onboarding.users.instrumentation"
+    ):
+        response = register(client, url)
+
+    assert response.status_code == 200
+    metrics = server_timing(response)
+    assert {"db", "hash", "serializer", "total"} <= set(metrics)
+    assert metrics["total"] >= metrics["hash"]
+    (line,) = [json.loads(record.message) for record in caplog.records]
+    assert line["status"] == 200
+    assert line["path"] == reverse(url)
+    assert line["timings"]["db"]["count"] >= 2
+
+
+def test_unsampled_request(client, settings):
+    """Verify requests outside of the sample are left alone."""
+    settings.INSTRUMENTATION_SAMPLE_PERCENT = 0
+
+    assert not register(client).has_header("Server-Timing")
+
+
+def test_timed():
+    """Verify blocks and functions are timed only within a request."""
+
+    @timed("work")
+    def work():
+        return "done"
+
+    @timed("work")
+    async def awork():
+        return "done"
+
+    assert work() == "done"
+
+    timings = Timings()
+    token = _timings.set(timings)
+    try:
+        work()
+        assert asyncio.run(awork()) == "done"
+        with timed("block"):
+            pass
+    finally:
+        _timings.reset(token)
+
+    assert timings.as_dict()["work"]["count"] == 2
+    assert timings.as_dict()["block"]["count"] == 1
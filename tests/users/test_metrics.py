@@ -0,0 +1,227 @@
+"""Prometheus metrics test cases."""
+import datetime
+import subprocess
+import sys
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector
+from rest_framework.test import APIClient
+
+from onboarding.users.metrics import parse_networks
+from onboarding.users.models import MyUser, OneTimePin
+from onboarding.users.stores import DatabaseOTPStore
+
+pytestmark = pytest.mark.django_db
+
+
+class Samples:
+    """Read metric samples as increments since creation."""
+
+    def __init__(self):
+        """Remember the current values."""
+        self.before = {}
+
+    def value(self, name: str, **labels) -> float:
+        """Return the current value of a sample."""
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def watch(self, name: str, **labels) -> None:
+        """Start counting increments of a sample."""
+        self.before[(name, *labels.items())] = self.value(name, **labels)
+
+    def delta(self, name: str, **labels) -> float:
+        """Return how much a watched sample grew."""
+        key = (name, *labels.items())
+        return self.value(name, **labels) - self.before[key]
+
+
+@pytest.fixture
+def samples():
+    """Track metric increments during a test."""
+    return Samples()
+
+
+def register(client, identifier, url="user-register", confirm="secret"):
+    """Register a user."""
+    payload = {
+        "identifier": identifier,
+        "identifier_type": "EMAIL",
+        "password": "secret",
+        "confirm_password": confirm,
+    }
+    return client.post(reverse(url), payload, format="json")
+
+
+@pytest.mark.parametrize("url", ["user-register", "async-user-register"])
+def test_registrations_counter(client, samples, url):
+    """Verify registrations are counted by result."""
+    for result in ("created", "duplicate", "invalid"):
+        samples.watch("onboarding_registrations_total", result=result)
+
+    register(client, "myuser@email.com", url)
+    register(client, "myuser@email.com", url)
+    register(client, "other@email.com", url, confirm="mismatch")
+
+    for result in ("created", "duplicate", "invalid"):
+        assert (
+            samples.delta("onboarding_registrations_total", result=result) == 1
+        )
+
+
+def test_batch_registrations_counter(client, samples):
+    """Verify every registration of a batch is counted."""
+    baker.make(MyUser, identifier="taken@email.com", identifier_type="EMAIL")
+    payload = [
+        {
+            "identifier": identifier,
+            "identifier_type": "EMAIL",
+            "password": "secret",
+            "confirm_password": "secret",
+        }
+        for identifier in ("new@email.com", "taken@email.com", "invalid")
+    ]
+    for result in ("created", "duplicate", "invalid"):
+        samples.watch("onboarding_registrations_total", result=result)
+
+    client.post(reverse("user-register-batch"), payload, format="json")
+
+    for result in ("created", "duplicate", "invalid"):
+        assert (
+            samples.delta("onboarding_registrations_total", result=result) == 1
+        )
+
+
+def test_otp_counters(client, samples):
+    """Verify issued, verified, failed and expired OTPs are counted."""
+    store = DatabaseOTPStore()
+    samples.watch("onboarding_otp_issued_total", result="issued")
+    for result in ("verified", "failed", "expired"):
+        samples.watch("onboarding_otp_verifications_total", result=result)
+
+    response = client.post(
+        reverse("user-otp"),
+        {"identifier": "myuser@email.com", "identifier_type": "EMAIL"},
+        format="json",
+    )
+    assert response.status_code == 200
+    code = OneTimePin.objects.get(identifier="myuser@email.com").code
+    assert store.verify(code, "myuser@email.com", "EMAIL")
+    assert not store.verify(code, "myuser@email.com", "EMAIL")
+
+    stale = baker.make(
+        OneTimePin, identifier="stale@email.com", identifier_type="EMAIL"
+    )
+    OneTimePin.objects.filter(pk=stale.pk).update(
+        timestamp=timezone.now() - datetime.timedelta(days=1)
+    )
+    assert not store.verify(stale.code, "stale@email.com", "EMAIL")
+
+    assert samples.delta("onboarding_otp_issued_total", result="issued") == 1
+    for result in ("verified", "failed", "expired"):
+        assert (
+            samples.delta("onboarding_otp_verifications_total", result=result)
+            == 1
+        )
+
+
+def test_auth_cache_counter(client, samples):
+    """Verify token cache hits and misses are counted."""
+    samples.watch("onboarding_auth_cache_total", result="hit")
+    samples.watch("onboarding_auth_cache_total", result="miss")
+
+    client.get(reverse("user-list"))
+    client.get(reverse("user-list"))
+
+    assert samples.delta("onboarding_auth_cache_total", result="miss") == 1
+    assert samples.delta("onboarding_auth_cache_total", result="hit") == 1
+
+
+def test_request_latency(client, samples):
+    """Verify request latency is observed by view name."""
+    labels = {"view": "user-register", "method": "POST", "status": "200"}
+    unmatched = {"view": "unmatched", "method": "GET", "status": "404"}
+    samples.watch("onboarding_request_duration_seconds_count", **labels)
+    samples.watch("onboarding_request_duration_seconds_count", **unmatched)
+
+    register(client, "myuser@email.com")
+    client.get("/no/such/page/")
+
+    assert (
+        samples.delta("onboarding_request_duration_seconds_count", **labels)
+        == 1
+    )
+    assert (
+        samples.delta("onboarding_request_duration_seconds_count", **unmatched)
+        == 1
+    )
+
+
+def test_metrics_endpoint():
+    """Verify the metrics are served in the Prometheus text format."""
+    response = APIClient().get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert b"onboarding_registrations_total" in response.content
+
+
+def test_metrics_endpoint_is_restricted(settings):
+    """Verify only allowed addresses can scrape the metrics."""
+    url = reverse("metrics")
+
+    response = APIClient().get(url, REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 403
+
+    settings.METRICS_ALLOWED_IPS = ["127.0.0.1", " 10.0.0.0/8", ""]
+    response = APIClient().get(url, REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 200
+
+
+def test_invalid_metrics_allowed_ips():
+    """Verify invalid scraper addresses are reported, not served."""
+    with pytest.raises(ImproperlyConfigured, match="10.0.0.300"):
+        parse_networks(["127.0.0.1", "10.0.0.300"])
+
+
+@pytest.mark.parametrize("url", ["user-register", "async-user-register"])
+def test_latency_of_failed_requests(client, samples, url):
+    """Verify latency is observed whatever the response of the view."""
+    labels = {"view": url, "method": "POST", "status": "400"}
+    samples.watch("onboarding_request_duration_seconds_count", **labels)
+
+    register(client, "myuser@email.com", url, confirm="mismatch")
+
+    assert (
+        samples.delta("onboarding_request_duration_seconds_count", **labels)
+        == 1
+    )
+
+
+WORKER = """
+from prometheus_client import Counter
+Counter("onboarding_test_total", "Test counter.").inc({})
+"""
+
+
+def test_workers_are_aggregated(tmp_path, monkeypatch):
+    """Verify the samples of every worker process are added up."""
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for increment in (1, 2, 3):
+        subprocess.run(
+            [sys.executable, "-c", WORKER.format(increment)],
+            env=env,
+            check=True,
+        )
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value("onboarding_test_total") == 6
+
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    response = APIClient().get(reverse("metrics"))
+    assert b"onboarding_test_total 6.0" in response.content
@@ -1,8 +1,11 @@
 """Users model instance test cases."""
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.db import connection
 from model_bakery import baker
 
 from config import settings
@@ -117,9 +120,11 @@ def test_expired_one_time_pin():
 
     time.sleep(settings.OTP_VALIDITY_SECONDS + 1)
     verified = verify_OTP(otp.code, otp.identifier, otp.identifier_type)
-    otp.refresh_from_db()
     assert not verified
-    assert not otp.valid
+
+    # An expired pin is left for the purge job rather than rewritten.
+    otp.refresh_from_db()
+    assert otp.valid
 
 
 def test_non_existent_one_time_pin():
@@ -132,3 +137,44 @@ def test_non_existent_one_time_pin():
 
     verified = verify_OTP("123456", otp.identifier, otp.identifier_type)
     assert not verified
+
+
+def test_verify_one_time_pin_is_a_single_query(django_assert_num_queries):
+    """Verify an OTP is checked and consumed in one statement."""
+    otp = baker.make(
+        OneTimePin,
+        identifier="myuser@email.com",
+        identifier_type="EMAIL",
+    )
+
+    with django_assert_num_queries(1):
+        assert verify_OTP(otp.code, otp.identifier, otp.identifier_type)
+
+    with django_assert_num_queries(1):
+        assert not verify_OTP(otp.code, otp.identifier, otp.identifier_type)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_verification_consumes_once():
+    """Verify a code hammered from many threads is only accepted once."""
+    otp = baker.make(
+        OneTimePin,
+        identifier="myuser@email.com",
+        identifier_type="EMAIL",
+    )
+    attempts = 32
+    barrier = threading.Barrier(attempts)
+
+    def attempt(_):
+        barrier.wait()
+        try:
+            return verify_OTP(otp.code, otp.identifier, otp.identifier_type)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=attempts) as executor:
+        results = list(executor.map(attempt, range(attempts)))
+
+    assert results.count(True) == 1
+    otp.refresh_from_db()
+    assert not otp.valid
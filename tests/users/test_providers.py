@@ -0,0 +1,163 @@
+"""OTP delivery provider test cases."""
+import asyncio
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from onboarding.users.providers import (
+    EmailProvider,
+    LoggingProvider,
+    SMSProvider,
+    get_provider,
+    render_OTP_message,
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Provider API stand-in accepting JSON posts."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        """Count every new connection."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        """Record the payload, rejecting messages for blocked numbers."""
+        length = int(self.headers["Content-Length"])
+        payload = json.loads(self.rfile.read(length))
+        with self.server.lock:
+            self.server.requests.append((self.path, payload, self.headers))
+
+        status = 500 if payload.get("to") == "+254700000000" else 202
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def server():
+    """Run a local provider API stand-in."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.lock = threading.Lock()
+    httpd.connections = 0
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def base_url(server):
+    """URL of the stand-in server."""
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_sms_provider_reuses_connections(server):
+    """Verify messages share a bounded pool of keep-alive connections."""
+    provider = SMSProvider(
+        url=f"{base_url(server)}/messages",
+        token="secret",
+        sender="ONBOARDING",
+        max_connections=2,
+    )
+    messages = [(f"+2547009998{i:02}", "code") for i in range(20)]
+
+    assert provider.send_batch(messages) == [None] * 20
+    assert provider.send_batch(messages[:5]) == [None] * 5
+
+    assert len(server.requests) == 25
+    assert server.connections <= 2
+    path, payload, headers = server.requests[0]
+    assert path == "/messages"
+    assert headers["Authorization"] == "Bearer secret"
+    assert payload["from"] == "ONBOARDING"
+    assert payload["message"] == "code"
+
+
+def test_sms_provider_reports_failed_messages(server):
+    """Verify a rejected message is reported without failing the rest."""
+    provider = SMSProvider(url=f"{base_url(server)}/messages")
+
+    errors = provider.send_batch(
+        [("+254700999888", "code"), ("+254700000000", "code")]
+    )
+
+    assert errors[0] is None
+    assert "500" in errors[1]
+
+
+def test_email_provider_submits_batches(server):
+    """Verify messages go to the batch endpoint in chunks."""
+    provider = EmailProvider(
+        url=f"{base_url(server)}/mail",
+        batch_url=f"{base_url(server)}/mail/batch",
+        subject="Verify",
+        batch_size=4,
+    )
+    messages = [(f"user{i}@email.com", "code") for i in range(10)]
+
+    assert provider.send_batch(messages) == [None] * 10
+
+    assert sorted(len(p["messages"]) for _, p, _ in server.requests) == [
+        2,
+        4,
+        4,
+    ]
+    _, payload, _ = server.requests[0]
+    assert payload["messages"][0]["subject"] == "Verify"
+
+
+def test_provider_from_another_event_loop(server):
+    """Verify async callers can share the provider pool."""
+    provider = SMSProvider(url=f"{base_url(server)}/messages")
+
+    errors = asyncio.run(provider.asend_batch([("+254700999888", "code")]))
+
+    assert errors == [None]
+    assert len(server.requests) == 1
+
+
+def test_logging_provider_is_logged(caplog):
+    """Verify messages are logged in place of delivery, codes masked."""
+    LoggingProvider().send_batch(
+        [
+            ("+254710234567", render_OTP_message("123456")),
+            ("+254710234568", "Tampered 123456"),
+        ]
+    )
+
+    assert caplog.messages == [
+        "OTP for +254710234567: Your one time PIN is ******",
+        "OTP for +254710234568: <message hidden>",
+    ]
+    assert logging.getLogger("onboarding").handlers
+
+
+def test_forked_child_builds_its_own_providers(settings):
+    """Verify a forked worker does not reuse the parent's providers."""
+    settings.OTP_PROVIDERS = {
+        "EMAIL": {"BACKEND": "onboarding.users.providers.LoggingProvider"}
+    }
+    provider = get_provider("EMAIL")
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, b"1" if get_provider("EMAIL") is provider else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    os.close(write)
+    with os.fdopen(read, "rb") as shared:
+        assert shared.read() == b"0"
+    assert get_provider("EMAIL") is provider
@@ -0,0 +1,59 @@
+"""OTP purge command test cases."""
+import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+
+from onboarding.users.models import OneTimePin, OutboxMessage
+
+pytestmark = pytest.mark.django_db
+
+
+def make_pins(name, count, age, **kwargs):
+    """Create pins issued `age` seconds ago."""
+    pins = baker.make(
+        OneTimePin,
+        identifier=iter(f"{name}{i}@email.com" for i in range(count)),
+        identifier_type="EMAIL",
+        _quantity=count,
+        **kwargs,
+    )
+    OneTimePin.objects.filter(pk__in=[pin.pk for pin in pins]).update(
+        timestamp=timezone.now() - datetime.timedelta(seconds=age)
+    )
+    return pins
+
+
+def test_purge_otps(settings):
+    """Verify stale pins are deleted in batches and fresh ones are kept."""
+    settings.OTP_VALIDITY_SECONDS = 10
+    settings.OTP_RESEND_COOLDOWN_SECONDS = 30
+    make_pins("expired", 5, age=3600)
+    make_pins("consumed", 2, age=3600, valid=False)
+    cooling_down = make_pins("cooling", 1, age=20, valid=False)
+    fresh = make_pins("fresh", 1, age=0)
+
+    out = StringIO()
+    call_command("purge_otps", "--batch-size=3", "--sleep=0", stdout=out)
+
+    assert "Deleted 7 one time PINs and 0 outbox messages" in out.getvalue()
+    assert set(OneTimePin.objects.values_list("pk", flat=True)) == {
+        cooling_down[0].pk,
+        fresh[0].pk,
+    }
+
+
+def test_purge_outbox_messages():
+    """Verify sent and failed messages are deleted, pending ones kept."""
+    for status in (OutboxMessage.SENT, OutboxMessage.FAILED):
+        baker.make(OutboxMessage, status=status, _quantity=2)
+    pending = baker.make(OutboxMessage, status=OutboxMessage.PENDING)
+
+    out = StringIO()
+    call_command("purge_otps", "--batch-size=3", "--sleep=0", stdout=out)
+
+    assert "0 one time PINs and 4 outbox messages" in out.getvalue()
+    assert list(OutboxMessage.objects.all()) == [pending]
@@ -0,0 +1,91 @@
+"""Query budget test cases."""
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from model_bakery import baker
+
+from onboarding.users.models import MyUser
+from onboarding.users.query_budgets import (
+    ENDPOINT_BUDGETS,
+    QueryBudgetExceeded,
+    measure_endpoint,
+    query_budget,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("name,method", ENDPOINT_BUDGETS)
+def test_endpoint_budget(name, method):
+    """Verify every endpoint stays within its query budget."""
+    budget, response = measure_endpoint(name, method)
+
+    assert response.status_code < 400, response.content
+    budget.check()
+
+
+def test_query_budget():
+    """Verify a block within its budget passes."""
+    with query_budget(1, {"users_myuser"}) as budget:
+        list(MyUser.objects.all())
+
+    assert budget.tables == {"users_myuser"}
+
+
+def test_query_budget_counts_queries():
+    """Verify a block running too many queries fails."""
+    with pytest.raises(QueryBudgetExceeded, match="2 queries"):
+        with query_budget(1):
+            MyUser.objects.count()
+            MyUser.objects.exists()
+
+
+def test_query_budget_checks_tables():
+    """Verify a block touching unexpected tables fails."""
+    with pytest.raises(QueryBudgetExceeded, match="users_onetimepin"):
+        with query_budget(2, {"users_myuser"}):
+            baker.make(
+                "users.OneTimePin",
+                identifier="a@email.com",
+                identifier_type="EMAIL",
+            )
+
+
+def test_query_budget_decorator():
+    """Verify functions can be decorated with a budget."""
+
+    @query_budget(0)
+    def count_users():
+        return MyUser.objects.count()
+
+    with pytest.raises(QueryBudgetExceeded):
+        count_users()
+
+
+def test_query_budgets_command():
+    """Verify the command reports the queries of every endpoint."""
+    out = StringIO()
+    call_command("query_budgets", "user-otp", "user-list", stdout=out)
+
+    report = out.getvalue()
+    assert "POST user-otp" in report
+    assert "GET user-list" in report
+    assert "POST user-list" in report
+    assert "user-register" not in report
+
+
+def test_query_budgets_command_fails_over_budget(monkeypatch):
+    """Verify the command fails when an endpoint is over its budget."""
+    monkeypatch.setitem(ENDPOINT_BUDGETS, ("user-list", "get"), (0, set()))
+
+    with pytest.raises(CommandError, match="GET user-list"):
+        call_command("query_budgets", "user-list", stdout=StringIO())
+
+
+def test_query_budgets_command_keeps_metrics_clean(monkeypatch, tmp_path):
+    """Verify the command refuses to count into the served metrics."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    with pytest.raises(CommandError, match="PROMETHEUS_MULTIPROC_DIR"):
+        call_command("query_budgets", "user-list", stdout=StringIO())
@@ -0,0 +1,92 @@
+"""Token revocation test cases."""
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from onboarding.users.models import MyUser, RevokedToken
+from onboarding.users.tokens import ClaimsRefreshToken
+
+pytestmark = pytest.mark.django_db
+
+
+def refresh(client, token):
+    """Exchange a refresh token for an access token."""
+    return client.post(
+        reverse("token_refresh"), {"refresh": str(token)}, format="json"
+    )
+
+
+def test_logout(client, user, django_assert_num_queries):
+    """Verify a refresh token stops working after logout."""
+    token = ClaimsRefreshToken.for_user(user)
+    assert refresh(client, token).status_code == 200
+    with django_assert_num_queries(0):
+        assert refresh(client, token).status_code == 200
+
+    response = client.post(
+        reverse("user-logout"), {"refresh": str(token)}, format="json"
+    )
+    assert response.status_code == 204
+    assert RevokedToken.objects.filter(jti=token["jti"]).exists()
+
+    with django_assert_num_queries(0):
+        response = refresh(client, token)
+    assert response.status_code == 401
+    assert (
+        refresh(client, ClaimsRefreshToken.for_user(user)).status_code == 200
+    )
+
+    response = client.post(
+        reverse("user-logout"), {"refresh": "nope"}, format="json"
+    )
+    assert response.status_code == 401
+
+
+def test_revocations_are_synchronized(client, user, settings):
+    """Verify revocations made by other processes are picked up."""
+    token = ClaimsRefreshToken.for_user(user)
+    assert refresh(client, token).status_code == 200
+
+    RevokedToken.objects.create(
+        jti=token["jti"],
+        expires_at=timezone.now() + datetime.timedelta(days=1),
+    )
+    assert refresh(client, token).status_code == 200
+
+    settings.TOKEN_DENYLIST_SYNC_SECONDS = 0
+    assert refresh(client, token).status_code == 401
+
+
+def test_revoke_user_tokens(client, user, settings):
+    """Verify every kind of token of a user can be revoked."""
+    settings.JWT_CLAIMS_AUTHENTICATION = True
+    token = ClaimsRefreshToken.for_user(user)
+    jwt_client = APIClient()
+    jwt_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+    url = reverse("user-revoke-tokens", args=[user.pk])
+
+    assert jwt_client.get(reverse("user-list")).status_code == 200
+    assert client.post(url).status_code == 204
+
+    assert refresh(APIClient(), token).status_code == 401
+    assert jwt_client.get(reverse("user-list")).status_code == 401
+    assert client.get(reverse("user-list")).status_code == 401
+    assert not Token.objects.filter(user=user).exists()
+
+
+def test_revoke_other_user_tokens(client, user):
+    """Verify only staff can revoke the tokens of other users."""
+    other = baker.make(
+        MyUser, identifier="other@email.com", identifier_type="EMAIL"
+    )
+    url = reverse("user-revoke-tokens", args=[other.pk])
+
+    assert client.post(url).status_code == 403
+    user.is_staff = True
+    user.save()
+    assert client.post(url).status_code == 204
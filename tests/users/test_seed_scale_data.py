@@ -0,0 +1,78 @@
+"""Scale data generation command test cases."""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from onboarding.users.identifiers import normalize_identifier
+from onboarding.users.management.commands.seed_scale_data import Identifiers
+from onboarding.users.models import MyUser, OneTimePin
+
+pytestmark = pytest.mark.django_db
+
+
+def seed(*args):
+    """Run the command, returning its output."""
+    out = StringIO()
+    call_command(
+        "seed_scale_data", "--passwords=2", *args, stdout=out, stderr=out
+    )
+    return out.getvalue()
+
+
+def test_seed_scale_data():
+    """Verify users and pins are inserted in chunks."""
+    out = seed("--users=50", "--otps=20", "--chunk-size=20")
+
+    assert "users: 40/50 rows" in out
+    assert "Inserted 50 users, skipped 0 existing" in out
+    assert "Inserted 20 pins, skipped 0 existing" in out
+    assert MyUser.objects.count() == 50
+    assert OneTimePin.objects.count() == 20
+    assert MyUser.objects.filter(is_active=False).count() == 1
+    assert OneTimePin.objects.filter(valid=True).count() == 5
+
+    oldest = OneTimePin.objects.order_by("timestamp").first()
+    assert (timezone.now() - oldest.timestamp).days == 365
+
+
+def test_seeded_users_are_valid():
+    """Verify generated identifiers are normalized and passwords pooled."""
+    seed("--users=20")
+
+    users = MyUser.objects.order_by("id")
+    for user in users:
+        assert user.identifier == normalize_identifier(
+            user.identifier, user.identifier_type
+        )
+    assert {user.identifier_type for user in users} == {
+        "EMAIL",
+        "PHONE_NUMBER",
+    }
+    assert users[0].check_password("password0")
+    assert users[2].check_password("password1")
+
+
+def test_seed_is_deterministic():
+    """Verify a seed always generates the same, distinct identifiers."""
+    identifiers = [Identifiers(seed=7)[number] for number in range(10000)]
+
+    assert len(set(identifiers)) == len(identifiers)
+    assert identifiers[:50] == [
+        Identifiers(seed=7)[number] for number in range(50)
+    ]
+    assert identifiers[:50] != [
+        Identifiers(seed=8)[number] for number in range(50)
+    ]
+
+
+def test_seed_skips_existing_rows():
+    """Verify running again only adds the new identifiers."""
+    seed("--users=10", "--otps=10")
+
+    out = seed("--users=15", "--otps=15")
+
+    assert "Inserted 5 users, skipped 10 existing" in out
+    assert "Inserted 5 pins, skipped 10 existing" in out
+    assert MyUser.objects.count() == 15
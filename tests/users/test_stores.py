@@ -0,0 +1,112 @@
+"""OTP storage backends test cases."""
+import time
+
+import pytest
+
+from onboarding.users.models import OneTimePin
+from onboarding.users.stores import (
+    CacheOTPStore,
+    DatabaseOTPStore,
+    get_otp_store,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def cache_store():
+    """Cache backed OTP store."""
+    return CacheOTPStore()
+
+
+def test_get_otp_store(settings):
+    """Verify the configured store is used."""
+    assert isinstance(get_otp_store(), DatabaseOTPStore)
+
+    settings.OTP_STORE = "onboarding.users.stores.CacheOTPStore"
+    assert isinstance(get_otp_store(), CacheOTPStore)
+
+
+def test_database_store():
+    """Verify issuing and verifying through the database."""
+    store = DatabaseOTPStore()
+    code = store.issue("myuser@email.com", "EMAIL")
+
+    assert OneTimePin.objects.get(identifier="myuser@email.com").code == code
+    assert store.verify(code, "myuser@email.com", "EMAIL")
+    assert not store.verify(code, "myuser@email.com", "EMAIL")
+
+
+def test_database_store_resend_replaces_code(
+    settings, django_assert_num_queries
+):
+    """Verify resending replaces the pin in a single statement."""
+    settings.OTP_RESEND_COOLDOWN_SECONDS = 0
+    store = DatabaseOTPStore()
+    first = store.issue("myuser@email.com", "EMAIL")
+    assert store.verify(first, "myuser@email.com", "EMAIL")
+
+    with django_assert_num_queries(1):
+        second = store.issue("myuser@email.com", "EMAIL")
+
+    otp = OneTimePin.objects.get(identifier="myuser@email.com")
+    assert OneTimePin.objects.count() == 1
+    assert otp.code == second
+    assert otp.valid
+    assert store.verify(second, "myuser@email.com", "EMAIL")
+
+
+def test_database_store_resend_cooldown(django_assert_num_queries):
+    """Verify a pin is not replaced during the cooldown."""
+    store = DatabaseOTPStore()
+    code = store.issue("myuser@email.com", "EMAIL")
+
+    with django_assert_num_queries(1):
+        assert store.issue("myuser@email.com", "EMAIL") is None
+
+    assert OneTimePin.objects.get(identifier="myuser@email.com").code == code
+
+
+def test_cache_store_is_single_use(cache_store, django_assert_num_queries):
+    """Verify a cached code can only be consumed once."""
+    with django_assert_num_queries(0):
+        code = cache_store.issue("+254700999888", "PHONE_NUMBER")
+        assert cache_store.verify(code, "+254700999888", "PHONE_NUMBER")
+        assert not cache_store.verify(code, "+254700999888", "PHONE_NUMBER")
+
+
+def test_cache_store_wrong_code(cache_store):
+    """Verify a code is bound to its identifier."""
+    code = cache_store.issue("+254700999888", "PHONE_NUMBER")
+
+    assert not cache_store.verify(code, "+254700999889", "PHONE_NUMBER")
+    assert not cache_store.verify(code, "+254700999888", "EMAIL")
+    assert cache_store.verify(code, "+254700999888", "PHONE_NUMBER")
+
+
+def test_cache_store_reissue_revokes_previous_code(cache_store, settings):
+    """Verify issuing a new code invalidates the previous one."""
+    settings.OTP_RESEND_COOLDOWN_SECONDS = 0
+    first = cache_store.issue("+254700999888", "PHONE_NUMBER")
+    second = cache_store.issue("+254700999888", "PHONE_NUMBER")
+
+    if first != second:
+        assert not cache_store.verify(first, "+254700999888", "PHONE_NUMBER")
+    assert cache_store.verify(second, "+254700999888", "PHONE_NUMBER")
+
+
+def test_cache_store_resend_cooldown(cache_store):
+    """Verify a code cannot be reissued during the cooldown."""
+    code = cache_store.issue("+254700999888", "PHONE_NUMBER")
+
+    assert cache_store.issue("+254700999888", "PHONE_NUMBER") is None
+    assert cache_store.verify(code, "+254700999888", "PHONE_NUMBER")
+
+
+def test_cache_store_expiry(cache_store, settings):
+    """Verify cached codes expire with the OTP validity window."""
+    settings.OTP_VALIDITY_SECONDS = 1
+    code = cache_store.issue("+254700999888", "PHONE_NUMBER")
+
+    time.sleep(1.1)
+    assert not cache_store.verify(code, "+254700999888", "PHONE_NUMBER")
@@ -0,0 +1,147 @@
+"""Sliding window throttle test cases."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from onboarding.users.throttling import IdentifierRateThrottle, IPRateThrottle
+
+VIEW = SimpleNamespace(action="otp")
+
+
+def make_request(identifier="+254710234567", ip="10.0.0.1"):
+    """Build the parts of a request the throttles look at."""
+    return SimpleNamespace(
+        data={"identifier": identifier, "identifier_type": "PHONE_NUMBER"},
+        META={"REMOTE_ADDR": ip},
+    )
+
+
+class Clock:
+    """Controllable throttle timer."""
+
+    def __init__(self, now):
+        """Start the clock."""
+        self.now = now
+
+    def __call__(self):
+        """Tell the time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the throttle clock at the start of a minute."""
+    clock = Clock(6000.0)
+    monkeypatch.setattr(IdentifierRateThrottle, "timer", clock)
+    monkeypatch.setattr(IPRateThrottle, "timer", clock)
+    return clock
+
+
+def hit(throttle_class=IdentifierRateThrottle, **kwargs):
+    """Send one request through a fresh throttle."""
+    throttle = throttle_class()
+    return throttle.allow_request(make_request(**kwargs), VIEW), throttle
+
+
+def test_sliding_window(settings, clock):
+    """Verify the previous bucket still counts while it slides out."""
+    settings.THROTTLE_RATES = {"otp_identifier": "4/m"}
+
+    assert [hit()[0] for _ in range(5)] == [True] * 4 + [False]
+    allowed, throttle = hit()
+    assert not allowed
+    assert throttle.wait() == pytest.approx(60 * (1 + 1 / 3))
+
+    # A quarter into the next minute, 6 * 0.75 requests still count.
+    clock.now += 75
+    allowed, throttle = hit()
+    assert not allowed
+    assert throttle.wait() == pytest.approx(60 * (1 - 3 / 6) - 15)
+
+    # Past the middle only 6 * 0.25 + 2 requests count.
+    clock.now += 30
+    assert hit()[0]
+
+
+def test_identifiers_are_normalized(settings, clock):
+    """Verify reformatting an identifier does not reset its count."""
+    settings.THROTTLE_RATES = {"otp_identifier": "1/m"}
+
+    assert hit(identifier="+254710234567")[0]
+    assert not hit(identifier="+254 710 234 567")[0]
+    assert hit(identifier="+254710234568")[0]
+    assert hit(identifier="not a number")[0]
+
+
+def test_ip_throttle(settings, clock):
+    """Verify clients are counted by IP address."""
+    settings.THROTTLE_RATES = {"otp_ip": "1/s"}
+
+    assert hit(IPRateThrottle, identifier="+254710234567")[0]
+    assert not hit(IPRateThrottle, identifier="+254710234568")[0]
+    assert hit(IPRateThrottle, ip="10.0.0.2")[0]
+
+
+def test_unconfigured_scope_is_not_throttled(settings, clock):
+    """Verify scopes without a rate skip the cache entirely."""
+    settings.THROTTLE_RATES = {}
+
+    assert all(hit()[0] for _ in range(100))
+    assert not cache._cache
+
+
+def test_one_round_trip_per_request(settings, clock, monkeypatch):
+    """Verify only the first request of a bucket does more than an incr."""
+    settings.THROTTLE_RATES = {"otp_identifier": "100/m"}
+    calls = []
+    for name in ("incr", "get", "add"):
+        method = getattr(cache, name)
+        monkeypatch.setattr(
+            cache,
+            name,
+            lambda *args, _method=method, _name=name, **kwargs: (
+                calls.append(_name) or _method(*args, **kwargs)
+            ),
+        )
+
+    hit()
+    assert calls == ["incr", "get", "add"]
+    calls.clear()
+    for _ in range(10):
+        hit()
+    assert calls == ["incr"] * 10
+
+
+def test_async_throttle_matches(settings, clock):
+    """Verify the async variant shares the counters."""
+    settings.THROTTLE_RATES = {"otp_identifier": "2/m"}
+
+    async def ahit():
+        return await IdentifierRateThrottle().aallow_request(
+            make_request(), VIEW
+        )
+
+    assert hit()[0]
+    assert asyncio.run(ahit())
+    assert not asyncio.run(ahit())
+    assert not hit()[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url", [reverse("user-otp"), reverse("async-user-otp")]
+)
+def test_otp_views_are_throttled(client, settings, url):
+    """Verify throttled OTP requests get a 429 with Retry-After."""
+    settings.THROTTLE_RATES = {"otp_ip": "2/h"}
+    settings.OTP_RESEND_COOLDOWN_SECONDS = 0
+    payload = {"identifier": "myuser@email.com", "identifier_type": "EMAIL"}
+
+    assert client.post(url, payload, format="json").status_code == 200
+    assert client.post(url, payload, format="json").status_code == 200
+    response = client.post(url, payload, format="json")
+    assert response.status_code == 429
+    assert 0 < int(response["Retry-After"]) <= 2 * 3600
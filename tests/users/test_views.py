@@ -1,10 +1,16 @@
 """Users app views test cases."""
+import json
+
 import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from model_bakery import baker
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from onboarding.users import hashing
 from onboarding.users.models import MyUser, OneTimePin
 
 pytestmark = pytest.mark.django_db
@@ -87,6 +93,46 @@ def test_register_user(client_with_credentials):
     assert data["refresh"]
 
 
+def test_register_user_is_a_single_write(client_with_credentials):
+    """Verify registration writes the user with one INSERT."""
+    url = reverse("user-register")
+    payload = {
+        "identifier": "myuser@EMAIL.com",
+        "identifier_type": "EMAIL",
+        "password": "admin",
+        "confirm_password": "admin",
+    }
+    with CaptureQueriesContext(connection) as context:
+        response = client_with_credentials.post(url, payload, format="json")
+
+    assert response.status_code == 200
+    writes = [
+        query["sql"]
+        for query in context.captured_queries
+        if not query["sql"].startswith("SELECT")
+    ]
+    assert len(writes) == 1
+    assert writes[0].startswith('INSERT INTO "users_myuser"')
+    user = MyUser.objects.get(identifier="myuser@email.com")
+    assert user.check_password("admin")
+
+
+def test_register_user_with_invalid_identifier(client_with_credentials):
+    """Verify registration with an invalid identifier."""
+    url = reverse("user-register")
+    payload = {
+        "identifier": "not-a-number",
+        "identifier_type": "PHONE_NUMBER",
+        "password": "admin",
+        "confirm_password": "admin",
+    }
+    response = client_with_credentials.post(url, payload, format="json")
+    assert response.status_code == 400
+
+    data = response.json()
+    assert data == {"identifier": ["The phone number entered is not valid."]}
+
+
 def test_register_user_with_passwords_not_matching(client_with_credentials):
     """Verify registration of a user with passwords not matching."""
     url = reverse("user-register")
@@ -103,8 +149,9 @@ def test_register_user_with_passwords_not_matching(client_with_credentials):
     assert data == {"confirm_password": "passwords do not match"}
 
 
-def test_register_existing_user(client_with_credentials):
+def test_register_existing_user(client_with_credentials, monkeypatch):
     """Verify creation of an existing user."""
+    monkeypatch.setattr(hashing, "hash_password", None)
     url = reverse("user-register")
     payload = {
         "identifier": "+254710234567",
@@ -119,6 +166,87 @@ def test_register_existing_user(client_with_credentials):
     assert data == {"user": "user with the same identifier exists"}
 
 
+def test_register_batch(
+    client_with_credentials, django_assert_max_num_queries
+):
+    """Verify registering many users in one request."""
+    url = reverse("user-register-batch")
+    payload = [
+        {
+            "identifier": "+254700999888",
+            "identifier_type": "PHONE_NUMBER",
+            "password": "admin",
+            "confirm_password": "admin",
+        },
+        {
+            "identifier": "+254710234567",
+            "identifier_type": "PHONE_NUMBER",
+            "password": "admin",
+            "confirm_password": "admin",
+        },
+        {
+            "identifier": "myuser@email.com",
+            "identifier_type": "EMAIL",
+            "password": "admin",
+            "confirm_password": "not-admin",
+        },
+        {
+            "identifier": "not-an-email",
+            "identifier_type": "EMAIL",
+            "password": "admin",
+            "confirm_password": "admin",
+        },
+        {
+            "identifier": "+254700999888",
+            "identifier_type": "PHONE_NUMBER",
+            "password": "admin",
+            "confirm_password": "admin",
+        },
+        {"identifier": "+254700999889"},
+    ]
+    with django_assert_max_num_queries(5):
+        response = client_with_credentials.post(url, payload, format="json")
+    assert response.status_code == 200
+
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [
+        "created",
+        "duplicate",
+        "invalid",
+        "invalid",
+        "duplicate",
+        "invalid",
+    ]
+    assert results[0]["user"] == "+254700999888"
+    assert results[0]["access"]
+    assert results[0]["refresh"]
+    assert results[2]["errors"] == {
+        "confirm_password": "passwords do not match"
+    }
+    assert results[3]["errors"] == {
+        "identifier": ["Enter a valid email address."]
+    }
+    assert "identifier_type" in results[5]["errors"]
+    assert MyUser.objects.get(identifier="+254700999888").check_password(
+        "admin"
+    )
+
+
+def test_register_batch_shape(client_with_credentials, settings):
+    """Verify the batch itself must be a bounded list."""
+    url = reverse("user-register-batch")
+
+    response = client_with_credentials.post(url, {}, format="json")
+    assert response.status_code == 400
+
+    response = client_with_credentials.post(url, [], format="json")
+    assert response.status_code == 400
+
+    oversized = [{}] * (settings.REGISTER_BATCH_MAX_SIZE + 1)
+    response = client_with_credentials.post(url, oversized, format="json")
+    assert response.status_code == 400
+
+
 def test_send_registration_otp(client_with_credentials):
     """Verify sending of a registration OTP."""
     url = reverse("user-otp")
@@ -133,6 +261,29 @@ def test_send_registration_otp(client_with_credentials):
     assert data == {"one_time_PIN": "sent successfully"}
 
 
+def test_resend_registration_otp(client_with_credentials, settings):
+    """Verify resending an OTP honours the cooldown."""
+    url = reverse("user-otp")
+    payload = {
+        "identifier": "+254700999888",
+        "identifier_type": "PHONE_NUMBER",
+    }
+    response = client_with_credentials.post(url, payload, format="json")
+    assert response.status_code == 200
+
+    response = client_with_credentials.post(url, payload, format="json")
+    assert response.status_code == 429
+    assert response["Retry-After"] == "30"
+    assert response.json() == {
+        "one_time_PIN": "wait before requesting another one"
+    }
+
+    settings.OTP_RESEND_COOLDOWN_SECONDS = 0
+    response = client_with_credentials.post(url, payload, format="json")
+    assert response.status_code == 200
+    assert OneTimePin.objects.count() == 1
+
+
 def test_verify_registration_otp(client_with_credentials):
     """Verify OTP verification."""
     otp = baker.make(
@@ -167,3 +318,187 @@ def test_verify_invalid_registration_otp(client_with_credentials):
 
     data = response.json()
     assert data == {"verification": False}
+
+
+def test_registration_otp_with_cache_store(client_with_credentials, settings):
+    """Verify the OTP flow against the cache store."""
+    settings.OTP_STORE = "onboarding.users.stores.CacheOTPStore"
+    payload = {
+        "identifier": "+254700999888",
+        "identifier_type": "PHONE_NUMBER",
+    }
+    response = client_with_credentials.post(
+        reverse("user-otp"), payload, format="json"
+    )
+    assert response.status_code == 200
+    assert not OneTimePin.objects.exists()
+
+    code = cache.get("otp:PHONE_NUMBER:+254700999888")
+    payload["code"] = code
+    response = client_with_credentials.post(
+        reverse("user-verify-otp"), payload, format="json"
+    )
+    assert response.json() == {"verification": True}
+
+
+def test_list_users_is_paginated(
+    client_with_credentials, user, django_assert_num_queries
+):
+    """Verify users are listed a page at a time without password hashes."""
+    baker.make(
+        MyUser,
+        identifier=iter(f"user{i}@email.com" for i in range(5)),
+        identifier_type="EMAIL",
+        _quantity=5,
+    )
+    url = reverse("user-list")
+
+    response = client_with_credentials.get(url, {"page_size": 4})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 4
+    assert data["results"][0]["identifier"] == "user4@email.com"
+    assert "password" not in data["results"][0]
+    assert set(data["results"][0]) == {
+        "identifier",
+        "identifier_type",
+        "is_active",
+        "is_staff",
+        "date_joined",
+    }
+
+    with django_assert_num_queries(1):
+        response = client_with_credentials.get(data["next"])
+    identifiers = [
+        result["identifier"] for result in response.json()["results"]
+    ]
+    assert identifiers == ["user0@email.com", "+254710234567"]
+    assert response.json()["next"] is None
+
+
+def test_list_users_with_equal_join_times(client_with_credentials, user):
+    """Verify users that joined at the same time are paged by id."""
+    users = baker.make(
+        MyUser,
+        identifier=iter(f"user{i}@email.com" for i in range(5)),
+        identifier_type="EMAIL",
+        _quantity=5,
+    )
+    MyUser.objects.filter(pk__in=[u.pk for u in users]).update(
+        date_joined=user.date_joined
+    )
+    url = reverse("user-list")
+
+    seen = []
+    response = client_with_credentials.get(url, {"page_size": 2})
+    while True:
+        data = response.json()
+        seen += [result["identifier"] for result in data["results"]]
+        if data["next"] is None:
+            break
+        response = client_with_credentials.get(data["next"])
+    assert seen == [f"user{i}@email.com" for i in reversed(range(5))] + [
+        "+254710234567"
+    ]
+
+    previous = client_with_credentials.get(data["previous"]).json()
+    assert [result["identifier"] for result in previous["results"]] == [
+        "user2@email.com",
+        "user1@email.com",
+    ]
+    assert previous["previous"] is not None
+
+
+def test_list_users_invalid_cursor(client_with_credentials):
+    """Verify a tampered cursor is rejected."""
+    response = client_with_credentials.get(
+        reverse("user-list"), {"cursor": "cD1ub3BlJm89MA=="}
+    )
+
+    assert response.status_code == 404
+
+
+def test_list_users_sparse_fields(client_with_credentials, user):
+    """Verify only the selected fields are returned."""
+    url = reverse("user-list")
+
+    response = client_with_credentials.get(url, {"fields": "identifier,nope"})
+    assert response.json()["results"] == [{"identifier": "+254710234567"}]
+
+    response = client_with_credentials.get(url, {"fields": "nope"})
+    assert "is_staff" in response.json()["results"][0]
+
+
+def test_retrieve_user_hides_password(client_with_credentials, user):
+    """Verify reading a user does not expose its password hash."""
+    response = client_with_credentials.get(
+        reverse("user-detail", args=[user.pk])
+    )
+
+    assert response.status_code == 200
+    assert response.json()["identifier"] == "+254710234567"
+    assert "password" not in response.json()
+
+
+def test_export_users_ndjson(client_with_credentials, user):
+    """Verify users are streamed as newline delimited JSON."""
+    baker.make(
+        MyUser,
+        identifier="myuser@email.com",
+        identifier_type="EMAIL",
+        is_active=False,
+    )
+    url = reverse("user-export")
+
+    response = client_with_credentials.get(url)
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [
+        json.loads(line)
+        for line in b"".join(response.streaming_content).splitlines()
+    ]
+    assert [row["identifier"] for row in rows] == [
+        "+254710234567",
+        "myuser@email.com",
+    ]
+    assert "password" not in rows[0]
+
+    response = client_with_credentials.get(
+        url, {"identifier_type": "EMAIL", "is_active": "false"}
+    )
+    lines = b"".join(response.streaming_content).splitlines()
+    assert [json.loads(line)["identifier"] for line in lines] == [
+        "myuser@email.com"
+    ]
+
+
+def test_export_users_csv(client_with_credentials, user):
+    """Verify users are streamed as CSV with a header."""
+    url = reverse("user-export")
+
+    response = client_with_credentials.get(
+        url, {"output": "csv", "date_joined_after": "2000-01-01T00:00:00Z"}
+    )
+    assert response["Content-Type"] == "text/csv"
+    assert 'filename="users.csv"' in response["Content-Disposition"]
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert lines[0] == (
+        "id,identifier,identifier_type,is_active,is_staff,date_joined"
+    )
+    assert lines[1].startswith(f"{user.pk},+254710234567,PHONE_NUMBER,")
+
+    response = client_with_credentials.get(
+        url, {"date_joined_before": "2000-01-01T00:00:00Z", "output": "csv"}
+    )
+    assert b"".join(response.streaming_content).decode().count("\n") == 1
+
+
+def test_export_users_invalid_filters(client_with_credentials):
+    """Verify invalid export options are rejected."""
+    response = client_with_credentials.get(
+        reverse("user-export"), {"output": "xml", "date_joined_after": "x"}
+    )
+
+    assert response.status_code == 400
+    assert set(response.json()) == {"output", "date_joined_after"}